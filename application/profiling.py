@@ -0,0 +1,149 @@
+import cProfile
+import io
+import logging
+import pstats
+import sys
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional
+
+class ExportProfiler:
+    """
+    Collects CPU (cProfile) and memory (tracemalloc) statistics per export phase.
+
+    Before Python 3.12, cProfile only sees the thread that enables it, so while a phase is
+    running every newly started thread (e.g. the client's fetch workers) gets its own
+    profiler as well; their stats are merged into the phase report. From 3.12 on, one
+    profiler already records all threads.
+    """
+
+    # From this version on cProfile uses sys.monitoring, which covers every thread
+    SINGLE_PROFILER_VERSION = (3, 12)
+
+    TOP_FUNCTIONS = 40
+    TOP_ALLOCATIONS = 25
+
+    def __init__(self, output_dir: str):
+        stamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        self.report_dir = Path(output_dir) / f"profile_{stamp}"
+        self.logger = logging.getLogger(__name__)
+        self._phases: Dict[str, Dict] = {}
+        self._order: List[str] = []
+
+    @contextmanager
+    def phase(self, name: str):
+        main_profiler = cProfile.Profile()
+        thread_profilers: List[cProfile.Profile] = []
+        lock = threading.Lock()
+
+        def start_thread_profiler(frame, event, arg):
+            # Runs once as the first profile event of each new thread, then hands over to cProfile
+            prof = cProfile.Profile()
+            try:
+                prof.enable()
+            except ValueError:
+                # Another profiler is already active; uninstall this hook so it does not
+                # run (and build a Profile) again on every call event of the thread
+                sys.setprofile(None)
+                return
+            with lock:
+                thread_profilers.append(prof)
+
+        started_tracemalloc = not tracemalloc.is_tracing()
+        if started_tracemalloc:
+            tracemalloc.start()
+        tracemalloc.reset_peak()
+        before = tracemalloc.take_snapshot()
+
+        per_thread = sys.version_info < self.SINGLE_PROFILER_VERSION
+        if per_thread:
+            threading.setprofile(start_thread_profiler)
+        t0 = time.perf_counter()
+        main_profiler.enable()
+        try:
+            yield
+        finally:
+            main_profiler.disable()
+            elapsed = time.perf_counter() - t0
+            if per_thread:
+                threading.setprofile(None)
+
+            after = tracemalloc.take_snapshot()
+            current, peak = tracemalloc.get_traced_memory()
+            if started_tracemalloc:
+                tracemalloc.stop()
+
+            stats = pstats.Stats(main_profiler)
+            with lock:
+                for prof in thread_profilers:
+                    try:
+                        stats.add(prof)
+                    except TypeError:
+                        # Profiler of a thread that never recorded anything
+                        pass
+
+            self._phases[name] = {
+                "seconds": elapsed,
+                "threads": len(thread_profilers),
+                "stats": stats,
+                "memory_diff": after.compare_to(before, "lineno"),
+                "memory_current": current,
+                "memory_peak": peak,
+            }
+            if name not in self._order:
+                self._order.append(name)
+
+    def write_reports(self) -> List[str]:
+        """Writes per-phase .prof dumps plus CPU and memory text reports. Returns created paths."""
+        if not self._phases:
+            return []
+        self.report_dir.mkdir(parents=True, exist_ok=True)
+        created = []
+
+        summary = ["phase,seconds,threads,peak_memory_kb"]
+        for name in self._order:
+            data = self._phases[name]
+            summary.append(f"{name},{data['seconds']:.3f},{data['threads']},{data['memory_peak'] / 1024:.0f}")
+
+            prof_path = self.report_dir / f"{name}.prof"
+            data["stats"].dump_stats(str(prof_path))
+            created.append(str(prof_path))
+
+            cpu_path = self.report_dir / f"{name}_cpu.txt"
+            buf = io.StringIO()
+            stats = pstats.Stats(str(prof_path), stream=buf)
+            stats.sort_stats("cumulative").print_stats(self.TOP_FUNCTIONS)
+            stats.sort_stats("tottime").print_stats(self.TOP_FUNCTIONS)
+            cpu_path.write_text(buf.getvalue(), encoding="utf-8")
+            created.append(str(cpu_path))
+
+            mem_path = self.report_dir / f"{name}_memory.txt"
+            lines = [
+                f"Peak traced memory: {data['memory_peak'] / 1024:.1f} KiB",
+                f"Traced memory at end: {data['memory_current'] / 1024:.1f} KiB",
+                "",
+                f"Top {self.TOP_ALLOCATIONS} allocation changes by line:",
+            ]
+            lines += [str(stat) for stat in data["memory_diff"][:self.TOP_ALLOCATIONS]]
+            mem_path.write_text("\n".join(lines) + "\n", encoding="utf-8")
+            created.append(str(mem_path))
+
+        summary_path = self.report_dir / "summary.csv"
+        summary_path.write_text("\n".join(summary) + "\n", encoding="utf-8")
+        created.append(str(summary_path))
+
+        self.logger.info(f"Profiling reports written to {self.report_dir}")
+        return created
+
+@contextmanager
+def optional_phase(profiler: Optional[ExportProfiler], name: str):
+    """Profiles the block if a profiler is given, otherwise does nothing."""
+    if profiler is None:
+        yield
+    else:
+        with profiler.phase(name):
+            yield
@@ -0,0 +1,294 @@
+import json
+import logging
+import random
+import threading
+import time
+from dataclasses import dataclass, field
+from datetime import date, datetime, timedelta
+from typing import Callable, Dict, List, Optional, Tuple
+from domain.analytics import NutritionHistory
+from domain.models import AuthToken, DayLog
+from application.use_cases import LoginUseCase, ExportDataUseCase
+
+@dataclass
+class AccountConfig:
+    name: str
+    output_dir: str
+    email: str = ""
+    password: str = ""
+    access_token: str = ""
+    interval_minutes: float = 360
+    history_days: int = 60
+
+@dataclass
+class SyncConfig:
+    accounts: List[AccountConfig]
+    host: str = "127.0.0.1"
+    port: int = 8765
+    # Product cache file shared with other exporter processes on the machine (optional)
+    product_cache: Optional[str] = None
+
+def load_sync_config(path: str) -> SyncConfig:
+    """
+    Reads the service configuration, e.g.:
+
+        {"port": 8765, "accounts": [{"name": "me", "email": "...", "password": "...",
+          "output_dir": "exports/me", "interval_minutes": 360, "history_days": 60}],
+         "product_cache": "/var/cache/yazio/products.sqlite"}
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        raw = json.load(f)
+
+    accounts = [AccountConfig(**a) for a in raw.get("accounts", [])]
+    if not accounts:
+        raise ValueError(f"No accounts configured in {path}")
+    names = [a.name for a in accounts]
+    if len(set(names)) != len(names):
+        raise ValueError(f"Account names must be unique in {path}")
+    for a in accounts:
+        if not (a.access_token or (a.email and a.password)):
+            raise ValueError(f"Account '{a.name}' needs either access_token or email and password")
+
+    return SyncConfig(
+        accounts=accounts,
+        host=raw.get("host", "127.0.0.1"),
+        port=int(raw.get("port", 8765)),
+        product_cache=raw.get("product_cache"),
+    )
+
+class AccountNotReady(RuntimeError):
+    """The account has no data yet: its first sync has not finished and nothing was archived."""
+
+@dataclass
+class AccountState:
+    """Cached data and sync status of one account. Guarded by SyncService's lock."""
+    config: AccountConfig
+    login_use_case: LoginUseCase
+    export_use_case: ExportDataUseCase
+    token: Optional[AuthToken] = None
+    days: Dict[date, DayLog] = field(default_factory=dict)
+    history: NutritionHistory = field(default_factory=NutritionHistory)
+    files: List[str] = field(default_factory=list)
+    next_sync: float = 0.0
+    last_sync: Optional[datetime] = None
+    # True once `days` holds real data: loaded from the local archive at start, or synced
+    ready: bool = False
+    last_duration: Optional[float] = None
+    last_error: Optional[str] = None
+    # Days the last sync could not fetch (their previously cached data is served)
+    failed_days: List[date] = field(default_factory=list)
+    syncing: bool = False
+    # Set by request_sync during a running sync, so that sync is followed by another one
+    sync_requested: bool = False
+
+class SyncService:
+    """
+    Keeps configured accounts synced on a schedule and caches their data in memory,
+    so queries are answered without touching the Yazio API.
+
+    Accounts are synced one at a time. First runs are staggered evenly across the
+    shortest sync interval, and each following run gets a little jitter, so the load
+    on the API stays spread out instead of arriving in bursts.
+    """
+
+    JITTER = 0.05  # fraction of the interval
+
+    def __init__(self, config: SyncConfig,
+                 use_case_factory: Callable[[AccountConfig], Tuple[LoginUseCase, ExportDataUseCase]],
+                 archive_loader: Optional[Callable[[AccountConfig, date, date], Optional[List[DayLog]]]] = None):
+        """
+        `archive_loader(account, start, end)` returns the account's days stored locally by
+        earlier runs (None if it has none). They are served at start, until the first sync.
+        """
+        self.config = config
+        self.archive_loader = archive_loader
+        self.logger = logging.getLogger(__name__)
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+        self.accounts: Dict[str, AccountState] = {}
+        now = time.time()
+        spread = min(a.interval_minutes for a in config.accounts) * 60
+        for i, account in enumerate(config.accounts):
+            login_uc, export_uc = use_case_factory(account)
+            state = AccountState(config=account, login_use_case=login_uc, export_use_case=export_uc)
+            if account.access_token:
+                state.token = AuthToken(access_token=account.access_token)
+            state.next_sync = now + spread * i / len(config.accounts)
+            self.accounts[account.name] = state
+
+    def start(self):
+        if self.archive_loader is not None:
+            self._load_archived()
+        self._thread = threading.Thread(target=self._run, name="yazio-sync", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._wake.set()
+        if self._thread:
+            self._thread.join()
+
+    def request_sync(self, name: str):
+        """Schedules an immediate sync of the account."""
+        with self._lock:
+            state = self._get(name)
+            state.next_sync = 0.0
+            if state.syncing:
+                state.sync_requested = True
+        self._wake.set()
+
+    def _load_archived(self):
+        # Without this, queries would answer with empty data until each account's staggered first sync
+        end_date = date.today()
+        for name, state in self.accounts.items():
+            start_date = end_date - timedelta(days=state.config.history_days)
+            try:
+                data = self.archive_loader(state.config, start_date, end_date)
+            except Exception as e:
+                self.logger.warning(f"[{name}] Could not load archived days: {e}")
+                continue
+            if data is None:
+                continue
+            with self._lock:
+                if state.ready:
+                    continue
+                self._replace_days(state, data, start_date, end_date, keep=set())
+                state.ready = True
+            self.logger.info(f"[{name}] Loaded {len(data)} archived days")
+
+    def _replace_days(self, state: AccountState, data: List[DayLog], start_date: date, end_date: date,
+                      keep: set):
+        """Replaces the cached days of [start_date, end_date] with `data`, except the days in `keep`."""
+        # Days inside the range that came back empty are dropped from the cache
+        for d in [d for d in state.days if start_date <= d <= end_date and d not in keep]:
+            del state.days[d]
+        for day in data:
+            state.days[day.date] = day
+        # Pass every day of the range so days that became empty are cleared in the history too
+        span = (end_date - start_date).days + 1
+        state.history.update([
+            state.days.get(start_date + timedelta(days=i)) or DayLog(date=start_date + timedelta(days=i))
+            for i in range(span)
+        ])
+
+    def _run(self):
+        while not self._stop.is_set():
+            with self._lock:
+                state = min(self.accounts.values(), key=lambda s: s.next_sync)
+                wait = state.next_sync - time.time()
+            if wait > 0:
+                self._wake.wait(wait)
+                self._wake.clear()
+                continue
+            self.sync(state.config.name)
+
+    def sync(self, name: str):
+        """Fetches and exports the account's recent history and refreshes its cache."""
+        with self._lock:
+            state = self._get(name)
+            state.syncing = True
+        account = state.config
+        t0 = time.time()
+        try:
+            if state.token is None:
+                self.logger.info(f"[{name}] Logging in...")
+                state.token = state.login_use_case.execute_password_login(account.email, account.password)
+
+            end_date = date.today()
+            start_date = end_date - timedelta(days=account.history_days)
+            files = state.export_use_case.execute(state.token, start_date, end_date, account.output_dir)
+            data = state.export_use_case.last_data
+            # Not fetched (e.g. server errors after retries): their cached data is kept
+            failed = set(state.export_use_case.last_failed_days)
+
+            with self._lock:
+                self._replace_days(state, data, start_date, end_date, keep=failed)
+                state.ready = True
+                if files:
+                    state.files = files
+                state.last_sync = datetime.now()
+                state.failed_days = sorted(failed)
+                state.last_error = (
+                    f"{len(failed)} day(s) could not be fetched: {', '.join(d.isoformat() for d in sorted(failed))}"
+                    if failed else None
+                )
+            if failed:
+                self.logger.error(f"[{name}] Sync incomplete: {state.last_error}")
+            else:
+                self.logger.info(f"[{name}] Synced {len(data)} days in {time.time() - t0:.1f}s")
+        except Exception as e:
+            self.logger.error(f"[{name}] Sync failed: {e}")
+            with self._lock:
+                state.last_error = str(e)
+                # Force a fresh login next time unless a fixed token was configured
+                # (an expired token surfaces here as an AuthenticationError)
+                if account.password:
+                    state.token = None
+        finally:
+            interval = account.interval_minutes * 60
+            with self._lock:
+                state.syncing = False
+                state.last_duration = time.time() - t0
+                if state.sync_requested:
+                    state.sync_requested = False
+                    state.next_sync = 0.0
+                else:
+                    state.next_sync = time.time() + interval * (1 + random.uniform(-self.JITTER, self.JITTER))
+
+    # --- Queries (served from the in-memory cache) ---
+
+    def status(self) -> List[Dict]:
+        with self._lock:
+            return [{
+                "name": s.config.name,
+                "syncing": s.syncing,
+                "ready": s.ready,
+                "last_sync": s.last_sync.isoformat() if s.last_sync else None,
+                "last_duration_s": round(s.last_duration, 2) if s.last_duration is not None else None,
+                "next_sync": datetime.fromtimestamp(s.next_sync).isoformat() if s.next_sync else None,
+                "last_error": s.last_error,
+                "failed_days": [d.isoformat() for d in s.failed_days],
+                "days_cached": len(s.days),
+                "first_day": min(s.days).isoformat() if s.days else None,
+                "last_day": max(s.days).isoformat() if s.days else None,
+            } for s in self.accounts.values()]
+
+    def days(self, name: str, start: date, end: date) -> List[DayLog]:
+        with self._lock:
+            state = self._get_ready(name)
+            return [state.days[d] for d in sorted(state.days) if start <= d <= end]
+
+    def summary(self, name: str, start: date, end: date, meal_slot: Optional[str] = None) -> Dict:
+        with self._lock:
+            h = self._get_ready(name).history
+            totals = h.totals(start, end, meal_slot)
+            return {
+                "start": start.isoformat(),
+                "end": end.isoformat(),
+                "meal": meal_slot,
+                "logged_days": h.logged_days(start, end),
+                "totals": vars(totals),
+                "daily_average": {
+                    n: h.average(start, end, n, meal_slot) for n in vars(totals)
+                },
+                "macro_ratios": h.macro_ratios(start, end),
+            }
+
+    def files(self, name: str) -> List[str]:
+        with self._lock:
+            return list(self._get(name).files)
+
+    def _get_ready(self, name: str) -> AccountState:
+        state = self._get(name)
+        if not state.ready:
+            raise AccountNotReady(f"Account '{name}' has not been synced yet"
+                                  + (f" (last error: {state.last_error})" if state.last_error else ""))
+        return state
+
+    def _get(self, name: str) -> AccountState:
+        if name not in self.accounts:
+            raise KeyError(name)
+        return self.accounts[name]
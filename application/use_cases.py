@@ -1,7 +1,12 @@
+import copy
+import os
+import tempfile
+from dataclasses import dataclass
 from datetime import date
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Callable
 from domain.interfaces import IAuthService, IYazioClient, IExporter
-from domain.models import AuthToken, DayLog
+from domain.models import AuthToken, DayLog, FetchPlan
+from application.profiling import ExportProfiler, optional_phase
 
 class LoginUseCase:
     def __init__(self, auth_service: IAuthService):
@@ -13,22 +18,85 @@ class LoginUseCase:
     def execute_google_login(self, id_token: str, access_token: str) -> AuthToken:
         return self.auth_service.login_with_google(id_token, access_token)
 
+@dataclass
+class ExportPlan:
+    start_date: date
+    end_date: date
+    fetch: FetchPlan
+    # Rough size of the files the export would write; None without local sample data
+    estimated_output_bytes: Optional[int] = None
+
 class ExportDataUseCase:
     def __init__(self, yazio_client: IYazioClient, exporter: IExporter):
         self.client = yazio_client
         self.exporter = exporter
+        self.last_profile_files: List[str] = []
+        # Days fetched by the last execute() call, for callers that keep them (e.g. the sync service)
+        self.last_data: List[DayLog] = []
+        # Days the last execute() call could not fetch; they are missing from `last_data` and the export
+        self.last_failed_days: List[date] = []
+
+    def execute(self, token: AuthToken, start_date: date, end_date: date, output_dir: str,
+                progress: Optional[Callable[[int, int], None]] = None,
+                profile: bool = False) -> List[str]:
+        """
+        Fetches and exports the range. With `profile=True`, CPU and memory statistics are
+        collected for the fetch and export phases and written to a `profile_<timestamp>`
+        folder inside `output_dir` (paths in `last_profile_files`).
+        """
+        profiler = ExportProfiler(output_dir) if profile else None
+        self.last_profile_files = []
+        self.last_data = []
+        self.last_failed_days = []
+        try:
+            # 1. Fetch data
+            print(f"Fetching data from {start_date} to {end_date}...")
+            with optional_phase(profiler, "fetch"):
+                data = self.client.get_days_data(token, start_date, end_date, progress=progress)
+            self.last_data = data
+            self.last_failed_days = self.client.last_failed_days
+            if self.last_failed_days:
+                print(f"Warning: {len(self.last_failed_days)} day(s) could not be fetched and are missing from the export.")
+
+            if not data:
+                print("No data found for the given period.")
+                return []
+
+            # 2. Export data
+            print(f"Exporting {len(data)} days of data...")
+            with optional_phase(profiler, "export"):
+                created_files = self.exporter.export(data, output_dir)
 
-    def execute(self, token: AuthToken, start_date: date, end_date: date, output_dir: str) -> List[str]:
-        # 1. Fetch data
-        print(f"Fetching data from {start_date} to {end_date}...")
-        data = self.client.get_days_data(token, start_date, end_date)
+            return created_files
+        finally:
+            # Reports are written even if a phase failed, that is when they are most useful
+            if profiler is not None:
+                self.last_profile_files = profiler.write_reports()
 
-        if not data:
-            print("No data found for the given period.")
-            return []
+    def plan(self, start_date: date, end_date: date) -> ExportPlan:
+        """
+        Dry run: estimates network requests, duration and output size of execute() for
+        the range from local caches and recent latencies. Nothing is fetched or written
+        to the output folder.
+        """
+        fetch = self.client.plan_fetch(start_date, end_date)
+        plan = ExportPlan(start_date=start_date, end_date=end_date, fetch=fetch)
 
-        # 2. Export data
-        print(f"Exporting {len(data)} days of data...")
-        created_files = self.exporter.export(data, output_dir)
+        sample = [d for d in fetch.sample_days if d.consumed_items]
+        if sample and fetch.expected_logged_days is not None:
+            # Exporting all and half of the sample separates per-day bytes from fixed
+            # overhead (headers, SQLite pages), which would otherwise be scaled up too
+            full = self._sample_export_bytes(sample)
+            fixed, per_day = 0.0, full / len(sample)
+            if len(sample) >= 2:
+                half = sample[len(sample) // 2:]
+                per_day = max(0.0, (full - self._sample_export_bytes(half)) / (len(sample) - len(half)))
+                fixed = max(0.0, full - per_day * len(sample))
+            plan.estimated_output_bytes = int(fixed + per_day * fetch.expected_logged_days)
+        return plan
 
-        return created_files
+    def _sample_export_bytes(self, sample: List[DayLog]) -> int:
+        # Exporters may keep state between exports (e.g. rolling history); export with a copy
+        exporter = copy.deepcopy(self.exporter)
+        with tempfile.TemporaryDirectory() as tmp:
+            return sum(os.path.getsize(f) for f in exporter.export(sample, tmp))
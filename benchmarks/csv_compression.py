@@ -0,0 +1,65 @@
+"""
+Benchmarks CsvExporter write throughput and output size per compression setting.
+
+Usage: python benchmarks/csv_compression.py [days] [items_per_day]
+"""
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from domain.models import DayLog, ConsumedItem, Product, Nutrients
+from infrastructure.exporters.csv_exporter import CsvExporter
+
+SLOTS = ["Café da manhã", "Almoço", "Jantar", "Lanches"]
+
+def build_data(days: int, items_per_day: int):
+    products = [
+        Product(id=f"p{i}", name=f"Product {i} with a realistic name",
+                nutrients=Nutrients(calories=1.0 + i % 7 / 10, protein=0.05, fat=0.02, carbs=0.15))
+        for i in range(500)
+    ]
+    start = date(2020, 1, 1)
+    return [
+        DayLog(date=start + timedelta(days=d), consumed_items=[
+            ConsumedItem(product=products[(d * items_per_day + i) % len(products)],
+                         amount_grams=50.0 + (i * 37 % 200), meal_slot=SLOTS[i % len(SLOTS)])
+            for i in range(items_per_day)
+        ])
+        for d in range(days)
+    ]
+
+def main():
+    days = int(sys.argv[1]) if len(sys.argv) > 1 else 1500
+    items_per_day = int(sys.argv[2]) if len(sys.argv) > 2 else 15
+    data = build_data(days, items_per_day)
+
+    settings = [(None, None), ("gzip", 1), ("gzip", 6), ("gzip", 9), ("zstd", 1), ("zstd", 3), ("zstd", 10)]
+    baseline_size = None
+
+    print(f"{days} days x {items_per_day} items")
+    print(f"{'compression':<12}{'level':>6}{'seconds':>10}{'MB/s (raw)':>12}{'size KB':>10}{'ratio':>8}")
+    for compression, level in settings:
+        try:
+            exporter = CsvExporter(compression=compression, compression_level=level)
+        except ImportError as e:
+            print(f"{compression:<12}{level:>6}  skipped: {e}")
+            continue
+
+        with tempfile.TemporaryDirectory() as out_dir:
+            t0 = time.perf_counter()
+            files = exporter.export(data, out_dir)
+            elapsed = time.perf_counter() - t0
+            size = sum(Path(p).stat().st_size for p in files)
+
+        if baseline_size is None:
+            baseline_size = size
+        raw_mb = baseline_size / 1024 / 1024
+        print(f"{compression or 'none':<12}{level if level is not None else '-':>6}"
+              f"{elapsed:>10.3f}{raw_mb / elapsed:>12.1f}{size / 1024:>10.0f}{baseline_size / size:>8.1f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,184 @@
+from datetime import date, timedelta
+from typing import Dict, List, Optional
+from .models import DayLog, Nutrients
+
+NUTRIENT_FIELDS = ("calories", "protein", "fat", "carbs")
+
+# kcal per gram, used for macro ratios
+KCAL_PER_GRAM = {"protein": 4.0, "fat": 9.0, "carbs": 4.0}
+
+# Key for totals across all meal slots
+ALL_MEALS = None
+
+class NutritionHistory:
+    """
+    Prefix sums over a contiguous calendar of days, per nutrient and meal slot.
+
+    Building is O(n) in the number of days; afterwards any range total or average is O(1).
+    New days can be added with `update`: appending after the current end only extends the
+    arrays, while changing an existing day recomputes the prefix sums from that day on.
+    Days without any logged items count as zero and are tracked separately, so averages
+    can be taken over logged days only.
+    """
+
+    def __init__(self, days: Optional[List[DayLog]] = None):
+        self.start: Optional[date] = None
+        # slot -> nutrient -> value per day index
+        self._values: Dict[Optional[str], Dict[str, List[float]]] = {}
+        # slot -> nutrient -> prefix sums (length = number of days + 1)
+        self._prefix: Dict[Optional[str], Dict[str, List[float]]] = {}
+        self._logged: List[int] = []
+        self._logged_prefix: List[int] = [0]
+        if days:
+            self.update(days)
+
+    @property
+    def end(self) -> Optional[date]:
+        if self.start is None:
+            return None
+        return self.start + timedelta(days=len(self._logged) - 1)
+
+    @property
+    def meal_slots(self) -> List[str]:
+        return sorted(slot for slot in self._values if slot is not ALL_MEALS)
+
+    def __len__(self) -> int:
+        return len(self._logged)
+
+    def update(self, days: List[DayLog]):
+        """Adds or replaces the given days."""
+        if not days:
+            return
+
+        first = min(d.date for d in days)
+        last = max(d.date for d in days)
+
+        if self.start is None or first < self.start:
+            # Days before the current start shift every index; rebuild from scratch
+            old_start = self.start
+            self.start = first
+            self._shift(0 if old_start is None else (old_start - first).days)
+
+        # Appended days have no prefix sums yet, so recompute at least from the old end
+        changed_from = len(self._logged)
+        self._grow((last - self.start).days + 1)
+
+        for day in days:
+            i = (day.date - self.start).days
+            self._set_day(i, day)
+            changed_from = min(changed_from, i)
+
+        self._rebuild_prefix(changed_from)
+
+    def total(self, start: date, end: date, nutrient: str = "calories",
+              meal_slot: Optional[str] = ALL_MEALS) -> float:
+        """Sum of `nutrient` over [start, end] (inclusive), optionally for one meal slot."""
+        lo, hi = self._bounds(start, end)
+        if lo >= hi:
+            return 0.0
+        prefix = self._prefix.get(meal_slot, {}).get(nutrient)
+        if prefix is None:
+            if nutrient not in NUTRIENT_FIELDS:
+                raise ValueError(f"Unknown nutrient '{nutrient}'")
+            return 0.0
+        return prefix[hi] - prefix[lo]
+
+    def logged_days(self, start: date, end: date) -> int:
+        lo, hi = self._bounds(start, end)
+        if lo >= hi:
+            return 0
+        return self._logged_prefix[hi] - self._logged_prefix[lo]
+
+    def average(self, start: date, end: date, nutrient: str = "calories",
+                meal_slot: Optional[str] = ALL_MEALS, logged_only: bool = True) -> Optional[float]:
+        """Daily average over [start, end]; None if there are no days to average."""
+        if logged_only:
+            count = self.logged_days(start, end)
+        else:
+            count = max(0, (end - start).days + 1)
+        if count == 0:
+            return None
+        return self.total(start, end, nutrient, meal_slot) / count
+
+    def rolling_average(self, day: date, window: int, nutrient: str = "calories",
+                        meal_slot: Optional[str] = ALL_MEALS, logged_only: bool = True) -> Optional[float]:
+        """Average over the `window` calendar days ending at `day`."""
+        return self.average(day - timedelta(days=window - 1), day, nutrient, meal_slot, logged_only)
+
+    def totals(self, start: date, end: date, meal_slot: Optional[str] = ALL_MEALS) -> Nutrients:
+        return Nutrients(**{n: self.total(start, end, n, meal_slot) for n in NUTRIENT_FIELDS})
+
+    def macro_ratios(self, start: date, end: date) -> Dict[str, Optional[float]]:
+        """Share of energy from protein, fat and carbs over [start, end], as fractions."""
+        kcal = {n: self.total(start, end, n) * factor for n, factor in KCAL_PER_GRAM.items()}
+        total = sum(kcal.values())
+        if total <= 0:
+            return {n: None for n in KCAL_PER_GRAM}
+        return {n: v / total for n, v in kcal.items()}
+
+    def _bounds(self, start: date, end: date):
+        """Converts an inclusive date range into clamped [lo, hi) prefix indexes."""
+        if self.start is None:
+            return 0, 0
+        lo = max(0, (start - self.start).days)
+        hi = min(len(self._logged), (end - self.start).days + 1)
+        return lo, hi
+
+    def _shift(self, offset: int):
+        """Prepends `offset` empty days."""
+        if offset <= 0:
+            return
+        for per_slot in self._values.values():
+            for n in NUTRIENT_FIELDS:
+                per_slot[n][:0] = [0.0] * offset
+        self._logged[:0] = [0] * offset
+        self._rebuild_prefix(0)
+
+    def _grow(self, size: int):
+        extra = size - len(self._logged)
+        if extra <= 0:
+            return
+        for per_slot in self._values.values():
+            for n in NUTRIENT_FIELDS:
+                per_slot[n].extend([0.0] * extra)
+        self._logged.extend([0] * extra)
+
+    def _slot_values(self, slot: Optional[str]) -> Dict[str, List[float]]:
+        if slot not in self._values:
+            size = len(self._logged)
+            self._values[slot] = {n: [0.0] * size for n in NUTRIENT_FIELDS}
+            self._prefix[slot] = {n: [0.0] * (size + 1) for n in NUTRIENT_FIELDS}
+        return self._values[slot]
+
+    def _set_day(self, i: int, day: DayLog):
+        # Clear whatever was stored for this day before
+        for per_slot in self._values.values():
+            for n in NUTRIENT_FIELDS:
+                per_slot[n][i] = 0.0
+
+        for item in day.consumed_items:
+            for slot in (ALL_MEALS, item.meal_slot):
+                values = self._slot_values(slot)
+                for n in NUTRIENT_FIELDS:
+                    values[n][i] += getattr(item.product.nutrients, n) * item.amount_grams
+
+        self._logged[i] = 1 if day.consumed_items else 0
+
+    def _rebuild_prefix(self, start_index: int):
+        for slot, per_slot in self._values.items():
+            prefixes = self._prefix[slot]
+            for n in NUTRIENT_FIELDS:
+                values = per_slot[n]
+                prefix = prefixes[n]
+                del prefix[start_index + 1:]
+                running = prefix[start_index]
+                for v in values[start_index:]:
+                    running += v
+                    prefix.append(running)
+
+        logged_prefix = self._logged_prefix
+        del logged_prefix[start_index + 1:]
+        running = logged_prefix[start_index]
+        for v in self._logged[start_index:]:
+            running += v
+            logged_prefix.append(running)
@@ -1,7 +1,7 @@
 from abc import ABC, abstractmethod
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Callable
 from datetime import date
-from .models import DayLog, AuthToken
+from .models import DayLog, AuthToken, FetchPlan
 
 class IAuthService(ABC):
     @abstractmethod
@@ -16,8 +16,23 @@ class IAuthService(ABC):
 
 class IYazioClient(ABC):
     @abstractmethod
-    def get_days_data(self, token: AuthToken, start_date: date, end_date: date) -> List[DayLog]:
-        """Fetches consumption data for a date range."""
+    def get_days_data(self, token: AuthToken, start_date: date, end_date: date,
+                      progress: Optional[Callable[[int, int], None]] = None) -> List[DayLog]:
+        """
+        Fetches consumption data for a date range.
+        If given, `progress(done, total)` is called as requests complete (from the calling thread).
+        `total` is the same for every call and `done` never decreases.
+        """
+        pass
+
+    @property
+    def last_failed_days(self) -> List[date]:
+        """Days the last get_days_data call could not fetch; they are missing from its result."""
+        return []
+
+    @abstractmethod
+    def plan_fetch(self, start_date: date, end_date: date) -> FetchPlan:
+        """Estimates the requests and time get_days_data would need for the range, without fetching."""
         pass
 
     @abstractmethod
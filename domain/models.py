@@ -1,3 +1,4 @@
+import hashlib
 from dataclasses import dataclass, field
 from typing import List, Optional
 from datetime import date
@@ -8,6 +9,9 @@ class AuthToken:
     refresh_token: str = ""
     expires_at: Optional[float] = None
 
+class AuthenticationError(RuntimeError):
+    """The API rejected the token (401/403); logging in again is needed."""
+
 @dataclass
 class Nutrients:
     calories: float = 0.0
@@ -21,6 +25,15 @@ class Product:
     name: str
     nutrients: Nutrients = field(default_factory=Nutrients)
 
+    @property
+    def key(self) -> str:
+        """Stable identifier; products built from incomplete data share the "unknown" id, so they are keyed by content."""
+        if self.id and self.id != "unknown":
+            return str(self.id)
+        n = self.nutrients
+        content = f"{self.name}|{n.calories}|{n.protein}|{n.fat}|{n.carbs}"
+        return "unknown-" + hashlib.sha1(content.encode("utf-8")).hexdigest()[:12]
+
 @dataclass
 class ConsumedItem:
     product: Product
@@ -95,3 +108,21 @@ class DayLog:
             cb += item.product.nutrients.carbs * item.amount_grams
 
         return Nutrients(calories=c, protein=p, fat=f, carbs=cb)
+
+@dataclass
+class FetchPlan:
+    """What a get_days_data call over the range would cost, estimated without fetching it."""
+    days_total: int = 0
+    # Day requests that would go to the network, and days answered locally (caches or archive)
+    day_requests: int = 0
+    days_from_cache: int = 0
+    # Product detail requests; None when nothing is known about the products in the range yet
+    product_requests: Optional[int] = None
+    # Referenced products that need no detail request (complete inline data or cached)
+    product_fetches_avoided: int = 0
+    expected_logged_days: Optional[int] = None
+    estimated_seconds: float = 0.0
+    # Number of observed latencies the estimate is based on (0: a default latency was assumed)
+    latency_samples: int = 0
+    # Recent days normalized from local data, for estimating the export size
+    sample_days: List[DayLog] = field(default_factory=list, repr=False)
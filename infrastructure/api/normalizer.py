@@ -0,0 +1,152 @@
+from datetime import date
+from typing import Any, Dict, List, Optional
+from domain.models import DayLog, ConsumedItem, Product, Nutrients
+
+class YazioNormalizer:
+    """
+    Turns raw Yazio API payloads into domain models.
+
+    Kept apart from the HTTP client so archived responses can be normalized again
+    (e.g. after a parsing fix) without touching the network.
+    """
+
+    # Lookup keys per nutrient, in priority order (dot notation walks nested dicts)
+    NUTRIENT_KEYS = {
+        "calories": ["energy", "calories", "energy.energy"],
+        "protein": ["protein", "nutrient.protein"],
+        "fat": ["fat", "nutrient.fat"],
+        "carbs": ["carbohydrates", "carbohydrate", "carbs", "nutrient.carb"],
+    }
+
+    SLOT_MAPPING = {
+        "breakfast": "Café da manhã",
+        "lunch": "Almoço",
+        "dinner": "Jantar",
+        "snack": "Lanches",
+        "snacks": "Lanches",
+        0: "Café da manhã",
+        1: "Almoço",
+        2: "Jantar",
+        3: "Lanches"
+    }
+
+    def day_items(self, data: Any) -> List[Dict]:
+        """Items of a consumed-items response."""
+        if isinstance(data, list):
+            return data
+        if isinstance(data, dict):
+            return data.get("products", []) + data.get("simple_products", [])
+        return []
+
+    def item_product_id(self, item: Dict) -> Optional[str]:
+        pid = item.get("product_id")
+        if not pid and isinstance(item.get("product"), dict):
+            pid = item["product"].get("id")
+        return pid
+
+    def inline_product(self, item: Dict, pid: Optional[str]) -> Product:
+        """Builds a Product from the data embedded in a consumed-items entry."""
+        p_data = item.get("product", {}) or {}
+        p_name = p_data.get("name") or item.get("name") or "Unknown Product"
+        p_nutrients = self.extract_nutrients(item.get("nutrients") or p_data.get("nutrients"))
+        return Product(id=pid or "unknown", name=p_name, nutrients=p_nutrients)
+
+    def has_complete_inline_product(self, item: Dict) -> bool:
+        """True if the entry carries a name and every nutrient we export."""
+        p_data = item.get("product", {}) or {}
+        name = p_data.get("name") or item.get("name")
+        if not isinstance(name, str) or not name.strip():
+            return False
+
+        nutrients = item.get("nutrients") or p_data.get("nutrients")
+        if not isinstance(nutrients, dict):
+            return False
+
+        return all(
+            self.lookup_nutrient(nutrients, keys) is not None
+            for keys in self.NUTRIENT_KEYS.values()
+        )
+
+    def product(self, pid: str, p_data: Dict) -> Product:
+        """Builds a Product from a products/<id> response."""
+        # Ensure ID is present
+        p_id = p_data.get("id", pid)
+        p_name = p_data.get("name", "Unknown Product")
+
+        # Nutrients in product details
+        # Legacy notes: "API returns values per base unit... fractional"
+        nutrients = self.extract_nutrients(p_data.get("nutrients", {}), p_data)
+
+        return Product(id=p_id, name=p_name, nutrients=nutrients)
+
+    def day_log(self, day_date: date, items_data: List[Dict], products_map: Dict[str, Product]) -> DayLog:
+        consumed_items = []
+        for item in items_data:
+            # Resolve Product
+            pid = self.item_product_id(item)
+
+            # Look up in map, or build from inline data (complete when hydration was skipped,
+            # otherwise a fallback that is better than nothing)
+            if pid and pid in products_map:
+                product = products_map[pid]
+            else:
+                product = self.inline_product(item, pid)
+
+            # Amount
+            amount = item.get("amount") or item.get("serving_amount") or 0.0
+
+            # Slot
+            slot_raw = item.get("daytime_slot") or item.get("slot") or item.get("daytime") or 3
+            slot_name = self.SLOT_MAPPING.get(slot_raw, "Lanches")
+            if isinstance(slot_raw, str):
+                slot_name = self.SLOT_MAPPING.get(slot_raw.lower(), "Lanches")
+
+            consumed_items.append(ConsumedItem(
+                product=product,
+                amount_grams=float(amount),
+                meal_slot=slot_name
+            ))
+
+        return DayLog(date=day_date, consumed_items=consumed_items)
+
+    def extract_nutrients(self, data: Any, extra_context: dict = None) -> Nutrients:
+        if not isinstance(data, dict):
+             # Try to find nutrients in extra_context (like product root)
+             if extra_context and "nutrients" in extra_context and isinstance(extra_context["nutrients"], dict):
+                 data = extra_context["nutrients"]
+             else:
+                 return Nutrients()
+
+        values = {}
+        for field_name, keys in self.NUTRIENT_KEYS.items():
+            val = self.lookup_nutrient(data, keys)
+            values[field_name] = val if val is not None else 0.0
+        return Nutrients(**values)
+
+    def lookup_nutrient(self, data: dict, keys: List[str]) -> Optional[float]:
+        """Returns the first numeric value found for the given keys, or None."""
+        for k in keys:
+             # Support dot notation e.g. "energy.energy"
+             parts = k.split('.')
+             val = data
+             found = True
+             for part in parts:
+                 if isinstance(val, dict) and part in val:
+                     val = val[part]
+                 else:
+                     found = False
+                     break
+
+             if found:
+                  if isinstance(val, dict):
+                      try: return float(val.get("value", 0))
+                      except (TypeError, ValueError): continue
+                  try: return float(val)
+                  except (TypeError, ValueError): continue
+
+             # Fallback: check if key exists literally (unlikely but good measure)
+             if k in data:
+                  v = data[k]
+                  try: return float(v)
+                  except (TypeError, ValueError): continue
+        return None
@@ -0,0 +1,220 @@
+import collections
+import concurrent.futures
+import logging
+import random
+import threading
+import time
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+import requests
+
+@dataclass
+class RetryPolicy:
+    """Exponential backoff with full jitter for idempotent GET requests."""
+    max_attempts: int = 4
+    base_delay: float = 0.5
+    max_delay: float = 8.0
+    retry_statuses: Tuple[int, ...] = (429, 500, 502, 503, 504)
+
+    def delay(self, attempt: int, retry_after: Optional[float] = None) -> float:
+        """Sleep before retry number `attempt` (1-based). Honours Retry-After when the server sends it."""
+        if retry_after is not None:
+            return min(self.max_delay, max(0.0, retry_after))
+        return random.uniform(0, min(self.max_delay, self.base_delay * (2 ** (attempt - 1))))
+
+@dataclass
+class HedgePolicy:
+    """
+    Sends a duplicate request when the first one is slower than `percentile` of recent
+    latencies for the endpoint, and uses whichever answers first.
+    """
+    percentile: float = 0.95
+    min_samples: int = 20
+    min_delay: float = 0.2
+    max_delay: float = 10.0
+
+@dataclass
+class EndpointBudget:
+    """
+    Per-endpoint limits that keep retries and hedges from overloading the API:
+    at most `max_in_flight` concurrent requests, and extra requests (retries + hedges)
+    limited to roughly `extra_ratio` of successful ones (plus a small `initial_tokens` allowance).
+    """
+    max_in_flight: int = 10
+    extra_ratio: float = 0.2
+    initial_tokens: float = 10.0
+    max_tokens: float = 100.0
+
+@dataclass
+class RequestStats:
+    requests: int = 0
+    retries: int = 0
+    hedges_sent: int = 0
+    hedges_won: int = 0
+    budget_exhausted: int = 0
+
+class _Endpoint:
+    def __init__(self, budget: EndpointBudget):
+        self.budget = budget
+        self.in_flight = threading.BoundedSemaphore(budget.max_in_flight)
+        self.latencies = collections.deque(maxlen=200)
+        self.tokens = budget.initial_tokens
+        self.lock = threading.Lock()
+
+    def record_success(self, seconds: float):
+        with self.lock:
+            self.latencies.append(seconds)
+            self.tokens = min(self.budget.max_tokens, self.tokens + self.budget.extra_ratio)
+
+    def take_token(self) -> bool:
+        with self.lock:
+            if self.tokens >= 1.0:
+                self.tokens -= 1.0
+                return True
+            return False
+
+    def percentile(self, p: float, min_samples: int) -> Optional[float]:
+        with self.lock:
+            if len(self.latencies) < min_samples:
+                return None
+            ordered = sorted(self.latencies)
+        return ordered[min(len(ordered) - 1, int(p * len(ordered)))]
+
+class ResilientRequester:
+    """Wraps a requests.Session with retries, optional hedging and per-endpoint budgets."""
+
+    def __init__(self, session: requests.Session, retry_policy: Optional[RetryPolicy] = None,
+                 hedge_policy: Optional[HedgePolicy] = None,
+                 budgets: Optional[Dict[str, EndpointBudget]] = None):
+        self.session = session
+        self.retry_policy = retry_policy or RetryPolicy(max_attempts=1)
+        self.hedge_policy = hedge_policy
+        self.budgets = budgets or {}
+        self.stats = RequestStats()
+        self.logger = logging.getLogger(__name__)
+        self._endpoints: Dict[str, _Endpoint] = {}
+        self._lock = threading.Lock()
+        # Separate pool for attempts, so hedges never wait on the caller's own workers
+        self._executor: Optional[concurrent.futures.ThreadPoolExecutor] = None
+
+    def reset_stats(self):
+        with self._lock:
+            self.stats = RequestStats()
+
+    def latencies(self, endpoint: str) -> List[float]:
+        """Recent successful request latencies (seconds) for the endpoint, oldest first."""
+        ep = self._endpoint(endpoint)
+        with ep.lock:
+            return list(ep.latencies)
+
+    def seed_latencies(self, endpoint: str, samples: List[float]):
+        """Preloads latencies observed by earlier runs, so hedging and estimates start warm."""
+        ep = self._endpoint(endpoint)
+        with ep.lock:
+            ep.latencies.extend(samples)
+
+    def get(self, endpoint: str, url: str, timeout: float, **kwargs) -> requests.Response:
+        """
+        GETs `url`, retrying transport errors and retryable statuses. The last response is
+        returned as-is (callers check the status); the last exception is raised if no
+        attempt produced a response.
+        """
+        ep = self._endpoint(endpoint)
+        policy = self.retry_policy
+        last_error: Optional[Exception] = None
+        resp = None
+
+        for attempt in range(1, policy.max_attempts + 1):
+            if attempt > 1:
+                if not ep.take_token():
+                    self._count("budget_exhausted")
+                    self.logger.warning(f"Retry budget for {endpoint} exhausted, giving up on {url}")
+                    break
+                self._count("retries")
+                time.sleep(policy.delay(attempt - 1, self._retry_after(resp)))
+
+            try:
+                resp = self._attempt(ep, url, timeout, kwargs)
+                last_error = None
+            except requests.RequestException as e:
+                last_error = e
+                resp = None
+                self.logger.debug(f"GET {url} failed (attempt {attempt}): {e}")
+                continue
+
+            if resp.status_code not in policy.retry_statuses:
+                return resp
+            self.logger.debug(f"GET {url} returned {resp.status_code} (attempt {attempt})")
+
+        if resp is not None:
+            return resp
+        raise last_error or RuntimeError(f"GET {url} was not attempted")
+
+    def _attempt(self, ep: _Endpoint, url: str, timeout: float, kwargs: dict) -> requests.Response:
+        hedge_after = None
+        if self.hedge_policy:
+            p = ep.percentile(self.hedge_policy.percentile, self.hedge_policy.min_samples)
+            if p is not None:
+                hedge_after = min(self.hedge_policy.max_delay, max(self.hedge_policy.min_delay, p))
+
+        if hedge_after is None:
+            return self._send(ep, url, timeout, kwargs)
+
+        executor = self._get_executor()
+        primary = executor.submit(self._send, ep, url, timeout, kwargs)
+        done, _ = concurrent.futures.wait([primary], timeout=hedge_after)
+        if done or not ep.take_token():
+            return primary.result()
+
+        self._count("hedges_sent")
+        hedge = executor.submit(self._send, ep, url, timeout, kwargs)
+        pending = {primary, hedge}
+        first_error = None
+        while pending:
+            done, pending = concurrent.futures.wait(pending, return_when=concurrent.futures.FIRST_COMPLETED)
+            for future in done:
+                try:
+                    resp = future.result()
+                except requests.RequestException as e:
+                    first_error = first_error or e
+                    continue
+                if future is hedge:
+                    self._count("hedges_won")
+                # The slower request keeps running in the background; its result is dropped
+                return resp
+        raise first_error
+
+    def _send(self, ep: _Endpoint, url: str, timeout: float, kwargs: dict) -> requests.Response:
+        self._count("requests")
+        with ep.in_flight:
+            t0 = time.perf_counter()
+            resp = self.session.get(url, timeout=timeout, **kwargs)
+        if resp.status_code not in self.retry_policy.retry_statuses:
+            ep.record_success(time.perf_counter() - t0)
+        return resp
+
+    def _endpoint(self, name: str) -> _Endpoint:
+        with self._lock:
+            if name not in self._endpoints:
+                self._endpoints[name] = _Endpoint(self.budgets.get(name, EndpointBudget()))
+            return self._endpoints[name]
+
+    def _get_executor(self) -> concurrent.futures.ThreadPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = concurrent.futures.ThreadPoolExecutor(
+                    max_workers=32, thread_name_prefix="yazio-hedge")
+            return self._executor
+
+    def _count(self, counter: str):
+        with self._lock:
+            setattr(self.stats, counter, getattr(self.stats, counter) + 1)
+
+    def _retry_after(self, resp: Optional[requests.Response]) -> Optional[float]:
+        if resp is None:
+            return None
+        value = resp.headers.get("Retry-After") if resp.headers else None
+        try:
+            return float(value) if value is not None else None
+        except ValueError:
+            return None
@@ -1,16 +1,112 @@
 import concurrent.futures
 import logging
+import math
+import random
 import requests
 from datetime import datetime, timedelta, date
-from typing import Dict, Any, List, Optional
+from dataclasses import dataclass, field
+from typing import Dict, Any, List, Optional, Callable
 from domain.interfaces import IYazioClient
-from domain.models import AuthToken, DayLog, ConsumedItem, Product, Nutrients
+from domain.models import AuthToken, AuthenticationError, DayLog, FetchPlan, Product
+from infrastructure.api.normalizer import YazioNormalizer
+from infrastructure.api.request_policy import ResilientRequester, RetryPolicy, HedgePolicy, EndpointBudget
+from infrastructure.archive.archive_client import ArchiveYazioClient
+from infrastructure.archive.raw_archive import RawArchive
+from infrastructure.cache.latency_log import LatencyLog
+from infrastructure.cache.negative_day_cache import NegativeDayCache
+from infrastructure.cache.shared_product_cache import SharedProductCache
+
+@dataclass
+class FetchStats:
+    """Counters describing the network work done by the last get_days_data call."""
+    days_requested: int = 0
+    days_with_data: int = 0
+    products_referenced: int = 0
+    products_fetched: int = 0
+    products_failed: int = 0
+    product_fetches_avoided: int = 0
+    # Product details served by the shared product cache instead of a request
+    products_from_shared_cache: int = 0
+    retries: int = 0
+    hedges_sent: int = 0
+    hedges_won: int = 0
+    days_skipped_cached: int = 0
+    days_skipped_by_probe: int = 0
+    probe_requests: int = 0
+    # Days that could not be fetched even after retrying (their data is missing from the result)
+    failed_days: List[date] = field(default_factory=list)
 
 class YazioClient(IYazioClient):
     BASE_URL = "https://yzapi.yazio.com"
     TIMEOUT = 30
-
-    def __init__(self):
+    # Per-attempt timeout for the read-only data endpoints (retried on failure)
+    REQUEST_TIMEOUT = 20
+
+    # Concurrent requests per fetch phase (days, then products)
+    FETCH_WORKERS = 10
+
+    # Consecutive empty probes needed before the days between them are skipped
+    PROBE_MIN_EMPTY_STREAK = 3
+
+    # Latency assumed by plan_fetch for an endpoint without observed requests
+    PLAN_DEFAULT_LATENCY = 0.5
+
+    # Endpoint names used for retry/hedge budgets
+    ENDPOINT_DAYS = "consumed-items"
+    ENDPOINT_PRODUCTS = "products"
+
+    # Product hydration policies:
+    # - always: fetch full details for every referenced product (most accurate)
+    # - missing: fetch only products whose inline consumed-items data is incomplete
+    # - never: build products purely from inline data, no second network phase
+    HYDRATION_ALWAYS = "always"
+    HYDRATION_MISSING = "missing"
+    HYDRATION_NEVER = "never"
+    HYDRATION_POLICIES = (HYDRATION_ALWAYS, HYDRATION_MISSING, HYDRATION_NEVER)
+
+    def __init__(self, hydration_policy: str = HYDRATION_ALWAYS,
+                 retry_policy: Optional[RetryPolicy] = None,
+                 hedge_policy: Optional[HedgePolicy] = None,
+                 budgets: Optional[Dict[str, EndpointBudget]] = None,
+                 negative_cache: Optional[NegativeDayCache] = None,
+                 probe_stride: Optional[int] = None,
+                 archive: Optional[RawArchive] = None,
+                 latency_log: Optional[LatencyLog] = None,
+                 product_cache: Optional[SharedProductCache] = None):
+        """
+        Args:
+            hydration_policy: One of HYDRATION_POLICIES.
+            retry_policy: Backoff for the data GETs; defaults to RetryPolicy().
+            hedge_policy: If set, slow data GETs get a duplicate request (see HedgePolicy).
+            budgets: Per-endpoint (ENDPOINT_DAYS / ENDPOINT_PRODUCTS) concurrency and retry budgets.
+            negative_cache: Days known to be empty are not requested again.
+            probe_stride: If set, long runs of uncached days are first probed every
+                `probe_stride` days, and stretches inside a streak of at least
+                PROBE_MIN_EMPTY_STREAK empty probes are skipped. This is a heuristic: an
+                isolated logged day in such a stretch is missed. Probe positions are shifted
+                randomly on each run and probed empty days are cached, so repeated runs
+                gradually cover the skipped stretches.
+            archive: If set, every raw consumed-items and product response is stored in it,
+                so exports can be rebuilt later without refetching (see ArchiveYazioClient).
+                plan_fetch also uses it to predict the products of archived days.
+            latency_log: Persists observed request latencies between runs for plan_fetch
+                estimates (and so hedging starts with a warm latency window).
+            product_cache: Product details shared with other processes on the machine;
+                cached products are not requested, fetched ones are added for the others.
+        """
+        if probe_stride is not None and probe_stride < 2:
+            raise ValueError("probe_stride must be at least 2")
+        if hydration_policy not in self.HYDRATION_POLICIES:
+            raise ValueError(
+                f"Unknown hydration policy '{hydration_policy}'. "
+                f"Expected one of: {', '.join(self.HYDRATION_POLICIES)}"
+            )
+        self.hydration_policy = hydration_policy
+        self.negative_cache = negative_cache
+        self.probe_stride = probe_stride
+        self.archive = archive
+        self.normalizer = YazioNormalizer()
+        self.last_stats = FetchStats()
         self.logger = logging.getLogger(__name__)
         self.session = requests.Session()
         self.session.headers.update({
@@ -18,6 +114,17 @@ class YazioClient(IYazioClient):
             "Accept": "application/json",
             "User-Agent": "Yazio/Android"
         })
+        self.requester = ResilientRequester(
+            self.session,
+            retry_policy=retry_policy or RetryPolicy(),
+            hedge_policy=hedge_policy,
+            budgets=budgets,
+        )
+        self.latency_log = latency_log
+        self.product_cache = product_cache
+        if latency_log is not None:
+            for endpoint in (self.ENDPOINT_DAYS, self.ENDPOINT_PRODUCTS):
+                self.requester.seed_latencies(endpoint, latency_log.samples(endpoint))
 
     def login_password(self, email: str, password: str) -> Dict[str, Any]:
         """Performs password login and returns raw token data."""
@@ -84,7 +191,8 @@ class YazioClient(IYazioClient):
 
         raise RuntimeError(f"Failed to authenticate with Yazio. Last error: {last_error}")
 
-    def get_days_data(self, token: AuthToken, start_date: date, end_date: date) -> List[DayLog]:
+    def get_days_data(self, token: AuthToken, start_date: date, end_date: date,
+                      progress: Optional[Callable[[int, int], None]] = None) -> List[DayLog]:
         self.session.headers["Authorization"] = f"Bearer {token.access_token}"
 
         date_list = []
@@ -95,6 +203,12 @@ class YazioClient(IYazioClient):
 
         raw_days_data: List[Dict] = []
         product_ids = set()
+        stats = FetchStats(days_requested=len(date_list))
+        self.last_stats = stats
+        self.requester.reset_stats()
+
+        # Days confirmed empty by this run (404 or no items), used by probing
+        empty_days = set()
 
         # 1. Fetch Days (Parallel)
         def fetch_day(day_date: date) -> Optional[Dict]:
@@ -103,171 +217,333 @@ class YazioClient(IYazioClient):
                 # Using v9 endpoint
                 url = f"{self.BASE_URL}/v9/user/consumed-items"
                 params = {"date": date_str}
-                resp = self.session.get(url, params=params, timeout=20)
+                resp = self.requester.get(self.ENDPOINT_DAYS, url, self.REQUEST_TIMEOUT, params=params)
 
                 if resp.status_code == 200:
                     data = resp.json()
-                    # Data normalization
-                    if isinstance(data, list):
-                         items = data
-                    elif isinstance(data, dict):
-                         items = data.get("products", []) + data.get("simple_products", [])
-                    else:
-                         items = []
+                    if self.archive is not None:
+                        self.archive.put_day(day_date, data)
+                    items = self.normalizer.day_items(data)
 
                     # Collect IDs
                     for item in items:
-                        pid = item.get("product_id")
-                        if not pid and "product" in item:
-                             pid = item["product"].get("id")
+                        pid = self.normalizer.item_product_id(item)
                         if pid:
                             product_ids.add(pid)
 
+                    if items:
+                        self._mark_logged(day_date)
+                    else:
+                        empty_days.add(day_date)
+                        self._mark_empty(day_date, NegativeDayCache.EMPTY)
                     return {"date": day_date, "items": items}
                 elif resp.status_code == 404:
+                    if self.archive is not None:
+                        self.archive.put_day(day_date, None)
+                    empty_days.add(day_date)
+                    self._mark_empty(day_date, NegativeDayCache.MISSING)
                     return None
+                self._check_auth(resp)
+                self.logger.warning(f"Failed to fetch {date_str}: {resp.status_code}")
+            except AuthenticationError:
+                raise
             except Exception as e:
                 self.logger.warning(f"Error fetching {date_str}: {e}")
-                return None
+            stats.failed_days.append(day_date)
             return None
 
+        # Days the negative cache knows are empty are not requested again
+        to_fetch = []
+        for d in date_list:
+            kind = self.negative_cache.get(d) if self.negative_cache is not None else None
+            if kind is None:
+                to_fetch.append(d)
+                continue
+            stats.days_skipped_cached += 1
+            if kind == NegativeDayCache.EMPTY:
+                # Same result as fetching it: a day without items
+                raw_days_data.append({"date": d, "items": []})
+
+        done_count = len(date_list) - len(to_fetch)
+        # One scale for both phases, so the bar never moves back when the product count
+        # becomes known: days fill the first half, product requests the second
+        progress_total = 2 * len(date_list)
+
+        def fetch_batch(days: List[date]):
+            nonlocal done_count
+            with concurrent.futures.ThreadPoolExecutor(max_workers=self.FETCH_WORKERS) as executor:
+                future_to_date = {executor.submit(fetch_day, d): d for d in days}
+                for future in concurrent.futures.as_completed(future_to_date):
+                    try:
+                        result = future.result()
+                    except AuthenticationError:
+                        # Every other request would be rejected too
+                        for f in future_to_date:
+                            f.cancel()
+                        raise
+                    if result:
+                        raw_days_data.append(result)
+                    done_count += 1
+                    if progress:
+                        progress(done_count, progress_total)
+
         # Execute Day Fetch
-        with concurrent.futures.ThreadPoolExecutor(max_workers=10) as executor:
-            future_to_date = {executor.submit(fetch_day, d): d for d in date_list}
-            for future in concurrent.futures.as_completed(future_to_date):
-                result = future.result()
-                if result:
-                    raw_days_data.append(result)
-
-        # 2. Fetch Products (Parallel)
-        self.logger.info(f"Fetching details for {len(product_ids)} unique products...")
+        if self.probe_stride and to_fetch:
+            probes, windows = self._plan_probes(to_fetch, self.probe_stride)
+            stats.probe_requests = len(probes)
+            fetch_batch(probes)
+            streaks = self._empty_probe_streaks(probes, empty_days)
+            to_fetch = []
+            for left, window, right in windows:
+                if streaks.get(left, 0) >= self.PROBE_MIN_EMPTY_STREAK and right in empty_days:
+                    stats.days_skipped_by_probe += len(window)
+                    done_count += len(window)
+                else:
+                    to_fetch.extend(window)
+            if stats.days_skipped_by_probe:
+                self.logger.info(
+                    f"Probing skipped {stats.days_skipped_by_probe} days in empty stretches "
+                    f"({stats.probe_requests} probe requests)"
+                )
+        fetch_batch(to_fetch)
+
+        if self.negative_cache is not None:
+            if stats.days_skipped_cached:
+                self.logger.info(f"Skipped {stats.days_skipped_cached} days known to be empty")
+            self.negative_cache.save()
+
+        stats.days_with_data = len(raw_days_data)
+        stats.products_referenced = len(product_ids)
+
+        # 2. Fetch Products (Parallel), limited by the hydration policy
+        ids_to_fetch = self._select_products_to_fetch(raw_days_data, product_ids)
+        stats.product_fetches_avoided = len(product_ids) - len(ids_to_fetch)
+        if stats.product_fetches_avoided:
+            self.logger.info(
+                f"Hydration policy '{self.hydration_policy}': skipping "
+                f"{stats.product_fetches_avoided} of {len(product_ids)} product fetches"
+            )
         products_map: Dict[str, Product] = {}
 
+        if self.product_cache is not None and ids_to_fetch:
+            by_key = {str(pid): pid for pid in ids_to_fetch}
+            for key, p_data in self.product_cache.get_many(by_key).items():
+                pid = by_key[key]
+                if self.archive is not None:
+                    self.archive.put_product(pid, p_data)
+                prod = self.normalizer.product(pid, p_data)
+                products_map[prod.id] = prod
+                ids_to_fetch.discard(pid)
+            stats.products_from_shared_cache = len(by_key) - len(ids_to_fetch)
+
+        self.logger.info(f"Fetching details for {len(ids_to_fetch)} unique products...")
+        # Raw responses for the shared cache; written once the phase is done
+        fetched_payloads: Dict[str, Any] = {}
+
         def fetch_product(pid: str) -> Optional[Product]:
             try:
                 # Legacy code uses v9 product endpoint
                 url = f"{self.BASE_URL}/v9/products/{pid}"
-                resp = self.session.get(url, timeout=20)
+                resp = self.requester.get(self.ENDPOINT_PRODUCTS, url, self.REQUEST_TIMEOUT)
                 if resp.status_code == 200:
                     p_data = resp.json()
-
-                    # Ensure ID is present
-                    p_id = p_data.get("id", pid)
-                    p_name = p_data.get("name", "Unknown Product")
-
-                    # Nutrients in product details
-                    # Legacy notes: "API returns values per base unit... fractional"
-                    nutrients = self._extract_nutrients(p_data.get("nutrients", {}), p_data)
-
-                    return Product(id=p_id, name=p_name, nutrients=nutrients)
+                    if self.archive is not None:
+                        self.archive.put_product(pid, p_data)
+                    fetched_payloads[pid] = p_data
+                    return self.normalizer.product(pid, p_data)
                 else:
+                    self._check_auth(resp)
                     self.logger.warning(f"Failed to fetch product {pid}: {resp.status_code}")
                     return None
+            except AuthenticationError:
+                raise
             except Exception as e:
                 self.logger.warning(f"Error fetching product {pid}: {e}")
                 return None
 
-        with concurrent.futures.ThreadPoolExecutor(max_workers=10) as executor:
-            future_to_pid = {executor.submit(fetch_product, pid): pid for pid in product_ids}
-            for future in concurrent.futures.as_completed(future_to_pid):
-                prod = future.result()
+        with concurrent.futures.ThreadPoolExecutor(max_workers=self.FETCH_WORKERS) as executor:
+            future_to_pid = {executor.submit(fetch_product, pid): pid for pid in ids_to_fetch}
+            for done, future in enumerate(concurrent.futures.as_completed(future_to_pid), 1):
+                try:
+                    prod = future.result()
+                except AuthenticationError:
+                    for f in future_to_pid:
+                        f.cancel()
+                    raise
                 if prod:
                     products_map[prod.id] = prod
-
-        # 3. Hydrate and Build Domain Models
-        results = []
-        for day_data in raw_days_data:
-            day_date = day_data["date"]
-            items_data = day_data["items"]
-
-            consumed_items = []
-            for item in items_data:
-                # Resolve Product
-                pid = item.get("product_id")
-                if not pid and "product" in item:
-                     pid = item["product"].get("id")
-
-                # Look up in map, or fallback to incomplete data (better than nothing)
-                if pid and pid in products_map:
-                    product = products_map[pid]
+                    stats.products_fetched += 1
                 else:
-                    # Fallback
-                    p_data = item.get("product", {}) or {}
-                    p_name = p_data.get("name") or item.get("name") or "Unknown Product"
-                    p_nutrients = self._extract_nutrients(item.get("nutrients") or p_data.get("nutrients"))
-                    product = Product(id=pid or "unknown", name=p_name, nutrients=p_nutrients)
-
-                # Amount
-                amount = item.get("amount") or item.get("serving_amount") or 0.0
-
-                # Slot
-                slot_raw = item.get("daytime_slot") or item.get("slot") or item.get("daytime") or 3
-                slot_mapping = {
-                    "breakfast": "Café da manhã",
-                    "lunch": "Almoço",
-                    "dinner": "Jantar",
-                    "snack": "Lanches",
-                    "snacks": "Lanches",
-                     0: "Café da manhã",
-                     1: "Almoço",
-                     2: "Jantar",
-                     3: "Lanches"
-                }
-                slot_name = slot_mapping.get(slot_raw, "Lanches")
-                if isinstance(slot_raw, str):
-                     slot_name = slot_mapping.get(slot_raw.lower(), "Lanches")
-
-                consumed_items.append(ConsumedItem(
-                    product=product,
-                    amount_grams=float(amount),
-                    meal_slot=slot_name
-                ))
-
-            results.append(DayLog(date=day_date, consumed_items=consumed_items))
+                    stats.products_failed += 1
+                if progress:
+                    progress(len(date_list) + len(date_list) * done // len(ids_to_fetch), progress_total)
+        if progress:
+            progress(progress_total, progress_total)
+
+        if self.product_cache is not None:
+            self.product_cache.put_many(fetched_payloads)
+
+        stats.retries = self.requester.stats.retries
+        stats.hedges_sent = self.requester.stats.hedges_sent
+        stats.hedges_won = self.requester.stats.hedges_won
+        stats.failed_days.sort()
+        if stats.failed_days:
+            self.logger.warning(
+                f"{len(stats.failed_days)} day(s) could not be fetched and are missing from the export: "
+                f"{', '.join(d.strftime('%Y-%m-%d') for d in stats.failed_days)}"
+            )
+
+        if self.archive is not None:
+            self.archive.save()
+        if self.latency_log is not None:
+            for endpoint in (self.ENDPOINT_DAYS, self.ENDPOINT_PRODUCTS):
+                self.latency_log.replace(endpoint, self.requester.latencies(endpoint))
+            self.latency_log.save()
 
+        # 3. Hydrate and Build Domain Models
+        results = [
+            self.normalizer.day_log(day_data["date"], day_data["items"], products_map)
+            for day_data in raw_days_data
+        ]
         results.sort(key=lambda x: x.date)
         return results
 
+    @property
+    def last_failed_days(self) -> List[date]:
+        return list(self.last_stats.failed_days)
+
+    def _check_auth(self, resp: requests.Response):
+        if resp.status_code in (401, 403):
+            raise AuthenticationError(f"Yazio rejected the access token ({resp.status_code}); log in again")
+
+    def plan_fetch(self, start_date: date, end_date: date) -> FetchPlan:
+        """
+        Estimates get_days_data for the range without sending requests. Day requests are
+        exact (minus what probing might skip). Product requests are predicted by applying
+        the hydration policy (and the shared product cache) to the archived responses of
+        the range and extrapolating to days not archived yet; without an archive they are
+        unknown (None).
+        """
+        days = [start_date + timedelta(days=i) for i in range((end_date - start_date).days + 1)]
+        to_fetch = [d for d in days if self.negative_cache is None or self.negative_cache.get(d) is None]
+        plan = FetchPlan(days_total=len(days), day_requests=len(to_fetch),
+                         days_from_cache=len(days) - len(to_fetch))
+
+        if self.archive is not None:
+            archived = [d for d in to_fetch if self.archive.has_day(d)]
+            raw_days_data = []
+            for d in archived:
+                payload = self.archive.get_day(d)
+                if payload is not None:
+                    raw_days_data.append({"date": d, "items": self.normalizer.day_items(payload)})
+            logged = [r for r in raw_days_data if r["items"]]
+            product_ids = {
+                pid for r in logged for pid in map(self.normalizer.item_product_id, r["items"]) if pid
+            }
+            ids_to_fetch = self._select_products_to_fetch(logged, product_ids)
+            if self.product_cache is not None:
+                cached = self.product_cache.contains(ids_to_fetch)
+                ids_to_fetch = {pid for pid in ids_to_fetch if str(pid) not in cached}
+            plan.product_fetches_avoided = len(product_ids) - len(ids_to_fetch)
+
+            if archived:
+                # Days not known yet are assumed to look like the known ones. Known days include
+                # the negative-cached ones: fetched empty days are archived but also cached, so
+                # the archived days left in `to_fetch` are mostly the logged ones
+                unarchived = len(to_fetch) - len(archived)
+                logged_rate = len(logged) / (len(archived) + plan.days_from_cache)
+                products_per_day = len(ids_to_fetch) / len(logged) if logged else 0.0
+                plan.expected_logged_days = len(logged) + round(unarchived * logged_rate)
+                plan.product_requests = len(ids_to_fetch) + round(unarchived * logged_rate * products_per_day)
+
+            sample = [r["date"] for r in logged[-ArchiveYazioClient.PLAN_SAMPLE_DAYS:]]
+            if not sample:
+                # Nothing archived in the range; the latest archived days still show the export size per day
+                sample = self.archive.day_dates()[-ArchiveYazioClient.PLAN_SAMPLE_DAYS:]
+            plan.sample_days = ArchiveYazioClient(self.archive, self.normalizer).load_days(sample)
+
+        plan.estimated_seconds = (
+            self._phase_seconds(self.ENDPOINT_DAYS, plan.day_requests, plan)
+            + self._phase_seconds(self.ENDPOINT_PRODUCTS, plan.product_requests or 0, plan)
+        )
+        return plan
+
+    def _phase_seconds(self, endpoint: str, requests_count: int, plan: FetchPlan) -> float:
+        """Requests run FETCH_WORKERS (or the endpoint's in-flight limit) at a time at the mean observed latency."""
+        samples = self.requester.latencies(endpoint)
+        plan.latency_samples += len(samples)
+        latency = sum(samples) / len(samples) if samples else self.PLAN_DEFAULT_LATENCY
+        budget = self.requester.budgets.get(endpoint, EndpointBudget())
+        concurrency = max(1, min(self.FETCH_WORKERS, budget.max_in_flight))
+        return math.ceil(requests_count / concurrency) * latency
+
+    def _mark_empty(self, day: date, kind: str):
+        if self.negative_cache is not None:
+            self.negative_cache.mark_empty(day, kind)
+
+    def _mark_logged(self, day: date):
+        if self.negative_cache is not None:
+            self.negative_cache.mark_logged(day)
+
+    def _plan_probes(self, days: List[date], stride: int):
+        """
+        Splits `days` into probe days and the windows between them.
+        Only runs of consecutive days long enough to be worth probing are split;
+        shorter runs become windows that are always fetched.
+        Returns (probes, [(left probe or None, window days, right probe or None), ...]).
+        """
+        runs: List[List[date]] = []
+        for d in days:
+            if runs and d - runs[-1][-1] == timedelta(days=1):
+                runs[-1].append(d)
+            else:
+                runs.append([d])
+
+        probes: List[date] = []
+        windows = []
+        for run in runs:
+            if len(run) < 3 * stride:
+                windows.append((None, run, None))
+                continue
+            # Random phase, so repeated runs probe different days
+            points = [0] + list(range(random.randint(1, stride), len(run), stride))
+            if points[-1] != len(run) - 1:
+                points.append(len(run) - 1)
+            probes.extend(run[i] for i in points)
+            for a, b in zip(points, points[1:]):
+                if b - a > 1:
+                    windows.append((run[a], run[a + 1:b], run[b]))
+        return probes, windows
+
+    def _empty_probe_streaks(self, probes: List[date], empty_days: set) -> Dict[date, int]:
+        """Maps each empty probe to the length of the run of consecutive empty probes it belongs to."""
+        streaks: Dict[date, int] = {}
+        current: List[date] = []
+        for d in sorted(probes) + [None]:
+            if d is not None and d in empty_days:
+                current.append(d)
+                continue
+            for member in current:
+                streaks[member] = len(current)
+            current = []
+        return streaks
+
+    def _select_products_to_fetch(self, raw_days_data: List[Dict], product_ids: set) -> set:
+        """Applies the hydration policy to decide which product ids need a detail request."""
+        if self.hydration_policy == self.HYDRATION_ALWAYS:
+            return set(product_ids)
+        if self.hydration_policy == self.HYDRATION_NEVER:
+            return set()
+
+        # HYDRATION_MISSING: a product is fetched if any occurrence lacks usable inline data
+        missing = set()
+        for day_data in raw_days_data:
+            for item in day_data["items"]:
+                pid = self.normalizer.item_product_id(item)
+                if pid and pid not in missing and not self.normalizer.has_complete_inline_product(item):
+                    missing.add(pid)
+        return missing
+
     def get_user_profile(self, token: AuthToken) -> Dict[str, Any]:
         # Not strictly needed for export, but implemented for interface compliance
         return {}
-
-    def _extract_nutrients(self, data: Any, extra_context: dict = None) -> Nutrients:
-        if not isinstance(data, dict):
-             # Try to find nutrients in extra_context (like product root)
-             if extra_context and "nutrients" in extra_context and isinstance(extra_context["nutrients"], dict):
-                 data = extra_context["nutrients"]
-             else:
-                 return Nutrients()
-
-        def get_val(keys):
-            for k in keys:
-                 # Support dot notation e.g. "energy.energy"
-                 parts = k.split('.')
-                 val = data
-                 found = True
-                 for part in parts:
-                     if isinstance(val, dict) and part in val:
-                         val = val[part]
-                     else:
-                         found = False
-                         break
-
-                 if found:
-                      if isinstance(val, dict): return float(val.get("value", 0))
-                      try: return float(val)
-                      except: continue
-
-                 # Fallback: check if key exists literally (unlikely but good measure)
-                 if k in data:
-                      v = data[k]
-                      try: return float(v)
-                      except: continue
-            return 0.0
-
-        return Nutrients(
-            calories=get_val(["energy", "calories", "energy.energy"]),
-            protein=get_val(["protein", "nutrient.protein"]),
-            fat=get_val(["fat", "nutrient.fat"]),
-            carbs=get_val(["carbohydrates", "carbohydrate", "carbs", "nutrient.carb"])
-        )
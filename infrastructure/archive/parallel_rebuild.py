@@ -0,0 +1,171 @@
+import concurrent.futures
+import logging
+from dataclasses import dataclass, field
+from datetime import date, timedelta
+from typing import Dict, List, Optional, Tuple
+from domain.interfaces import IExporter
+from domain.models import DayLog, ConsumedItem, Product, Nutrients
+from infrastructure.archive.archive_client import ArchiveYazioClient
+from infrastructure.archive.raw_archive import RawArchive
+
+# Compact form of a list of DayLogs passed between processes: each distinct product is sent
+# once as (id, name, calories, protein, fat, carbs) and items refer to it by index.
+#   (products, [(date ordinal, [(product index, amount_grams, meal_slot), ...]), ...])
+PackedDays = Tuple[List[tuple], List[Tuple[int, List[tuple]]]]
+
+def pack_days(days: List[DayLog]) -> PackedDays:
+    products: List[tuple] = []
+    index: Dict[tuple, int] = {}
+    packed = []
+    for day in days:
+        items = []
+        for item in day.consumed_items:
+            p, n = item.product, item.product.nutrients
+            row = (p.id, p.name, n.calories, n.protein, n.fat, n.carbs)
+            if row not in index:
+                index[row] = len(products)
+                products.append(row)
+            items.append((index[row], item.amount_grams, item.meal_slot))
+        packed.append((day.date.toordinal(), items))
+    return products, packed
+
+def unpack_days(packed: PackedDays) -> List[DayLog]:
+    products, days = packed
+    # Items of the same product share one Product, as they do after a live fetch
+    objects = [Product(id=pid, name=name, nutrients=Nutrients(calories=c, protein=p, fat=f, carbs=cb))
+               for pid, name, c, p, f, cb in products]
+    return [
+        DayLog(date=date.fromordinal(ordinal), consumed_items=[
+            ConsumedItem(product=objects[i], amount_grams=amount, meal_slot=slot)
+            for i, amount, slot in items
+        ])
+        for ordinal, items in days
+    ]
+
+def merge_packed(shards: List[PackedDays]) -> PackedDays:
+    """Concatenates shards (given in date order) into one, remapping product indices."""
+    products: List[tuple] = []
+    index: Dict[tuple, int] = {}
+    days = []
+    for shard_products, shard_days in shards:
+        remap = []
+        for row in shard_products:
+            if row not in index:
+                index[row] = len(products)
+                products.append(row)
+            remap.append(index[row])
+        days.extend((ordinal, [(remap[i], amount, slot) for i, amount, slot in items])
+                    for ordinal, items in shard_days)
+    return products, days
+
+def month_shards(start: date, end: date) -> List[Tuple[date, date]]:
+    """Splits [start, end] into calendar-month ranges."""
+    shards = []
+    curr = start
+    while curr <= end:
+        next_month = (curr.replace(day=1) + timedelta(days=32)).replace(day=1)
+        shards.append((curr, min(end, next_month - timedelta(days=1))))
+        curr = next_month
+    return shards
+
+# Worker entry points (module level so they can be pickled)
+
+# Per worker process: archive root -> client, so refs.json is parsed once per worker
+# instead of once per shard
+_worker_clients: Dict[str, ArchiveYazioClient] = {}
+
+def _normalize_shard(archive_root: str, start: date, end: date) -> PackedDays:
+    client = _worker_clients.get(archive_root)
+    if client is None:
+        client = _worker_clients[archive_root] = ArchiveYazioClient(RawArchive(archive_root))
+    return pack_days(client.get_days_data(None, start, end))
+
+def _export(exporter: IExporter, packed: PackedDays, output_dir: str) -> List[str]:
+    return exporter.export(unpack_days(packed), output_dir)
+
+@dataclass
+class RebuildJob:
+    """One account's archive and where to write its rebuilt export. Dates default to the archived range."""
+    name: str
+    archive_root: str
+    output_dir: str
+    start: Optional[date] = None
+    end: Optional[date] = None
+
+@dataclass
+class RebuildResult:
+    name: str
+    days: int = 0
+    files: List[str] = field(default_factory=list)
+    error: Optional[str] = None
+
+class ParallelRebuilder:
+    """
+    Rebuilds exports from raw archives on all cores.
+
+    Each account's range is split into months, and every (account, month) shard is
+    decoded and normalized in a worker process. An account's shards are merged in date
+    order as soon as they are all done, and its export then runs in a worker as well, so
+    accounts overlap with each other. Results cross process boundaries in the compact
+    PackedDays form rather than as pickled DayLogs.
+    """
+
+    def __init__(self, exporter: IExporter, max_workers: Optional[int] = None):
+        # The exporter is pickled into the workers, so it must not hold open resources
+        self.exporter = exporter
+        self.max_workers = max_workers
+        self.logger = logging.getLogger(__name__)
+
+    def rebuild(self, jobs: List[RebuildJob]) -> List[RebuildResult]:
+        results = [RebuildResult(name=job.name) for job in jobs]
+        shards: Dict[int, List[Tuple[date, date]]] = {}
+        for i, job in enumerate(jobs):
+            start, end = job.start, job.end
+            if start is None or end is None:
+                archived = RawArchive(job.archive_root).day_dates()
+                if not archived:
+                    self._fail(results[i], f"no archived days in {job.archive_root}")
+                    continue
+                start, end = start or archived[0], end or archived[-1]
+            shards[i] = month_shards(start, end)
+
+        with concurrent.futures.ProcessPoolExecutor(max_workers=self.max_workers) as executor:
+            normalize = {}
+            for i, ranges in shards.items():
+                for n, (start, end) in enumerate(ranges):
+                    future = executor.submit(_normalize_shard, jobs[i].archive_root, start, end)
+                    normalize[future] = (i, n)
+
+            done: Dict[int, Dict[int, PackedDays]] = {i: {} for i in shards}
+            exports = {}
+            for future in concurrent.futures.as_completed(normalize):
+                i, n = normalize[future]
+                if results[i].error:
+                    continue
+                try:
+                    done[i][n] = future.result()
+                except Exception as e:
+                    self._fail(results[i], f"normalization: {e}")
+                    continue
+                if len(done[i]) == len(shards[i]):
+                    packed = merge_packed([done[i][n] for n in range(len(shards[i]))])
+                    del done[i]
+                    results[i].days = len(packed[1])
+                    if not packed[1]:
+                        self._fail(results[i], "no data in the archived range")
+                        continue
+                    exports[executor.submit(_export, self.exporter, packed, jobs[i].output_dir)] = i
+
+            for future in concurrent.futures.as_completed(exports):
+                i = exports[future]
+                try:
+                    results[i].files = future.result()
+                    self.logger.info(f"[{results[i].name}] Rebuilt {results[i].days} days")
+                except Exception as e:
+                    self._fail(results[i], f"export: {e}")
+
+        return results
+
+    def _fail(self, result: RebuildResult, message: str):
+        result.error = message
+        self.logger.error(f"[{result.name}] Rebuild failed: {message}")
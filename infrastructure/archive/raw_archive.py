@@ -0,0 +1,113 @@
+import gzip
+import hashlib
+import json
+import logging
+import threading
+from datetime import date
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+from infrastructure.exporters.file_output import atomic_write
+
+class RawArchive:
+    """
+    Local, content-addressed store of raw API responses.
+
+    Payloads are stored gzip-compressed under `objects/<2 hex>/<sha256>.json.gz`, where the
+    hash is taken over the canonical JSON, so identical responses (unchanged days refetched
+    by later runs, products referenced from several accounts) are stored once.
+    `refs.json` maps each day and product id to the object of its latest response;
+    a day the API answered with 404 maps to null.
+    """
+
+    def __init__(self, root: str):
+        self.root = Path(root)
+        self.objects_dir = self.root / "objects"
+        self.refs_path = self.root / "refs.json"
+        self.logger = logging.getLogger(__name__)
+        self._lock = threading.Lock()
+        self._dirty = False
+        self.objects_written = 0
+        self.objects_reused = 0
+        self._refs: Dict[str, Dict[str, Optional[str]]] = {"days": {}, "products": {}}
+        self._load()
+
+    def _load(self):
+        if not self.refs_path.exists():
+            return
+        try:
+            with open(self.refs_path, "r", encoding="utf-8") as f:
+                refs = json.load(f)
+            self._refs["days"].update(refs.get("days", {}))
+            self._refs["products"].update(refs.get("products", {}))
+        except (OSError, ValueError) as e:
+            self.logger.warning(f"Ignoring unreadable archive refs {self.refs_path}: {e}")
+
+    # --- Writing ---
+
+    def put_day(self, day: date, payload: Any):
+        """Records the consumed-items response for `day` (None for a 404)."""
+        self._set_ref("days", day.isoformat(), None if payload is None else self._put_object(payload))
+
+    def put_product(self, product_id: str, payload: Any):
+        self._set_ref("products", str(product_id), self._put_object(payload))
+
+    def save(self):
+        with self._lock:
+            if not self._dirty:
+                return
+            self.root.mkdir(parents=True, exist_ok=True)
+            with atomic_write(self.refs_path) as f:
+                json.dump(self._refs, f, sort_keys=True)
+            self._dirty = False
+
+    def _set_ref(self, kind: str, key: str, digest: Optional[str]):
+        with self._lock:
+            refs = self._refs[kind]
+            if key not in refs or refs[key] != digest:
+                refs[key] = digest
+                self._dirty = True
+
+    def _put_object(self, payload: Any) -> str:
+        data = json.dumps(payload, sort_keys=True, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+        digest = hashlib.sha256(data).hexdigest()
+        path = self._object_path(digest)
+        if path.exists():
+            self.objects_reused += 1
+            return digest
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # Concurrent writers of the same object both produce identical content
+        with atomic_write(path, compression="gzip") as f:
+            f.write(data.decode("utf-8"))
+        self.objects_written += 1
+        return digest
+
+    def _object_path(self, digest: str) -> Path:
+        return self.objects_dir / digest[:2] / f"{digest}.json.gz"
+
+    # --- Reading ---
+
+    def has_day(self, day: date) -> bool:
+        with self._lock:
+            return day.isoformat() in self._refs["days"]
+
+    def get_day(self, day: date) -> Any:
+        """The archived response for `day`; None if it was a 404 or was never archived."""
+        with self._lock:
+            digest = self._refs["days"].get(day.isoformat())
+        return self._get_object(digest)
+
+    def get_product(self, product_id: str) -> Any:
+        with self._lock:
+            digest = self._refs["products"].get(str(product_id))
+        return self._get_object(digest)
+
+    def day_dates(self) -> List[date]:
+        """All archived days, in date order."""
+        with self._lock:
+            return sorted(date.fromisoformat(d) for d in self._refs["days"])
+
+    def _get_object(self, digest: Optional[str]) -> Any:
+        if digest is None:
+            return None
+        with gzip.open(self._object_path(digest), "rt", encoding="utf-8") as f:
+            return json.load(f)
@@ -0,0 +1,52 @@
+import base64
+import hashlib
+import json
+import os
+import sys
+from pathlib import Path
+from typing import Optional
+from domain.models import AuthToken
+
+APP_NAME = "yazio-consumer"
+
+def user_data_dir() -> Path:
+    """
+    Per-user folder for data that must outlive the process. Not the app folder: in
+    frozen builds that is a temporary extraction folder deleted on exit.
+    """
+    if sys.platform == "win32":
+        base = Path(os.environ.get("LOCALAPPDATA") or Path.home() / "AppData" / "Local")
+    elif sys.platform == "darwin":
+        base = Path.home() / "Library" / "Application Support"
+    else:
+        base = Path(os.environ.get("XDG_DATA_HOME") or Path.home() / ".local" / "share")
+    return base / APP_NAME
+
+def account_key(email: str = "", token: Optional[AuthToken] = None) -> str:
+    """
+    Folder name for an account's caches: a hash of the login email, or else of the
+    token's subject (JWT `sub`), or else of the token itself.
+    """
+    if email.strip():
+        identity = "email:" + email.strip().lower()
+    elif token is not None:
+        subject = _token_subject(token.access_token)
+        identity = f"sub:{subject}" if subject else "token:" + token.access_token
+    else:
+        raise ValueError("An email or a token is needed to identify the account")
+    return hashlib.sha256(identity.encode("utf-8")).hexdigest()[:16]
+
+def account_cache_dir(email: str = "", token: Optional[AuthToken] = None) -> Path:
+    return user_data_dir() / "accounts" / account_key(email, token)
+
+def _token_subject(access_token: str) -> Optional[str]:
+    # Only reads the claim to tell accounts apart; the signature is not checked
+    parts = access_token.split(".")
+    if len(parts) != 3:
+        return None
+    try:
+        payload = base64.urlsafe_b64decode(parts[1] + "=" * (-len(parts[1]) % 4))
+        subject = json.loads(payload).get("sub")
+    except (ValueError, AttributeError):
+        return None
+    return str(subject) if subject else None
@@ -0,0 +1,45 @@
+import json
+import logging
+import threading
+from pathlib import Path
+from typing import Dict, List
+from infrastructure.exporters.file_output import atomic_write
+
+class LatencyLog:
+    """
+    Persists the most recent request latencies per endpoint between runs, so a new
+    process can estimate request durations (and hedge) before it has sent anything.
+    """
+
+    def __init__(self, path: str, max_samples: int = 200):
+        self.path = Path(path)
+        self.max_samples = max_samples
+        self.logger = logging.getLogger(__name__)
+        self._lock = threading.Lock()
+        # endpoint -> latencies in seconds, oldest first
+        self._samples: Dict[str, List[float]] = {}
+        self._load()
+
+    def _load(self):
+        if not self.path.exists():
+            return
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                self._samples = json.load(f)
+        except (OSError, ValueError) as e:
+            self.logger.warning(f"Ignoring unreadable latency log {self.path}: {e}")
+
+    def samples(self, endpoint: str) -> List[float]:
+        with self._lock:
+            return list(self._samples.get(endpoint, []))
+
+    def replace(self, endpoint: str, samples: List[float]):
+        """Stores the latest window of samples for the endpoint (older ones are dropped)."""
+        with self._lock:
+            self._samples[endpoint] = [round(s, 4) for s in samples[-self.max_samples:]]
+
+    def save(self):
+        with self._lock:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            with atomic_write(self.path) as f:
+                json.dump(self._samples, f)
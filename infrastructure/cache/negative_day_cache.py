@@ -0,0 +1,88 @@
+import json
+import logging
+import threading
+import time
+from datetime import date, datetime, timedelta
+from pathlib import Path
+from typing import Dict, Optional
+from infrastructure.exporters.file_output import atomic_write
+
+class NegativeDayCache:
+    """
+    Persistent record of days the API reported as having nothing logged.
+
+    Entries for days that were already older than `recent_days` when checked never expire
+    (those days are rarely edited after the fact). Entries checked while the day was recent
+    expire after `recent_ttl_hours`, since the user may still have been logging it. The last
+    `live_days` days (today and yesterday by default) are never cached: meals logged between
+    two exports a few hours apart would otherwise be skipped.
+    """
+
+    # How the API reported the day: 404, or 200 with an empty item list
+    MISSING = "missing"
+    EMPTY = "empty"
+
+    def __init__(self, path: str, recent_days: int = 14, recent_ttl_hours: float = 6, live_days: int = 2):
+        self.path = Path(path)
+        self.recent_days = recent_days
+        self.live_days = live_days
+        self.recent_ttl = recent_ttl_hours * 3600
+        self.logger = logging.getLogger(__name__)
+        self._lock = threading.Lock()
+        self._dirty = False
+        # "YYYY-MM-DD" -> [kind, checked_at]
+        self._entries: Dict[str, list] = {}
+        self._load()
+
+    def _load(self):
+        if not self.path.exists():
+            return
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                self._entries = json.load(f)
+        except (OSError, ValueError) as e:
+            self.logger.warning(f"Ignoring unreadable empty-day cache {self.path}: {e}")
+
+    def get(self, day: date, now: Optional[float] = None) -> Optional[str]:
+        """Returns MISSING/EMPTY if the day is known to be empty, else None."""
+        now = now or time.time()
+        if self._is_live(day, now):
+            return None
+        with self._lock:
+            entry = self._entries.get(day.isoformat())
+        if entry is None:
+            return None
+        kind, checked_at = entry
+        # Permanent only if the day was already `recent_days` old when it was checked;
+        # a day checked while it could still be logged keeps expiring, however old it gets
+        settled_from = datetime.combine(day + timedelta(days=self.recent_days), datetime.min.time()).timestamp()
+        if checked_at < settled_from and now - checked_at > self.recent_ttl:
+            return None
+        return kind
+
+    def mark_empty(self, day: date, kind: str = EMPTY):
+        if self._is_live(day, time.time()):
+            return
+        with self._lock:
+            self._entries[day.isoformat()] = [kind, time.time()]
+            self._dirty = True
+
+    def mark_logged(self, day: date):
+        with self._lock:
+            if self._entries.pop(day.isoformat(), None) is not None:
+                self._dirty = True
+
+    def _is_live(self, day: date, now: float) -> bool:
+        return day > date.fromtimestamp(now) - timedelta(days=self.live_days)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def save(self):
+        with self._lock:
+            if not self._dirty:
+                return
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            with atomic_write(self.path) as f:
+                json.dump(self._entries, f)
+            self._dirty = False
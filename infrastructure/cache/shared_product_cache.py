@@ -0,0 +1,192 @@
+import json
+import logging
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, Optional, Set
+
+@dataclass
+class SharedCacheStats:
+    """Totals over every process that used the cache since it was created."""
+    entries: int = 0
+    hits: int = 0
+    misses: int = 0
+    stores: int = 0
+    evictions: int = 0
+
+    @property
+    def hit_rate(self) -> Optional[float]:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else None
+
+class SharedProductCache:
+    """
+    Product detail responses shared by every exporter process on the machine.
+
+    Backed by a SQLite file in WAL mode with memory-mapped reads. Lookups only read a
+    WAL snapshot, so they never wait for writers in other processes. Their recency and
+    hit/miss updates are buffered and written with the next store (or by `flush`) in
+    one write transaction (BEGIN IMMEDIATE), so concurrent processes still keep
+    consistent counters. Raw payloads are stored (not Products), so normalization fixes
+    still apply.
+
+    Entries older than `max_age_days` count as misses (products are occasionally edited);
+    beyond `max_entries`, the least recently used entries are evicted.
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS products (
+            product_id TEXT PRIMARY KEY,
+            payload TEXT NOT NULL,
+            fetched_at REAL NOT NULL,
+            last_used REAL NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS idx_products_last_used ON products (last_used);
+        CREATE TABLE IF NOT EXISTS stats (
+            name TEXT PRIMARY KEY,
+            value INTEGER NOT NULL
+        );
+        INSERT OR IGNORE INTO stats (name, value)
+            VALUES ('hits', 0), ('misses', 0), ('stores', 0), ('evictions', 0);
+    """
+
+    MMAP_SIZE = 64 * 1024 * 1024
+    # Buffered lookup updates written without waiting for the next store
+    FLUSH_PENDING = 5000
+    BUSY_TIMEOUT_MS = 10000
+
+    def __init__(self, path: str, max_entries: int = 50000, max_age_days: float = 30):
+        if max_entries < 1:
+            raise ValueError("max_entries must be at least 1")
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.max_entries = max_entries
+        self.max_age = max_age_days * 86400
+        self.logger = logging.getLogger(__name__)
+        self._lock = threading.Lock()
+        # Lookup side effects not written yet: product id -> last used, counter -> delta
+        self._pending_used: Dict[str, float] = {}
+        self._pending_counts: Dict[str, int] = {}
+        # Autocommit mode; transactions are opened explicitly with BEGIN IMMEDIATE
+        self.conn = sqlite3.connect(str(self.path), check_same_thread=False, isolation_level=None,
+                                    timeout=self.BUSY_TIMEOUT_MS / 1000)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute(f"PRAGMA mmap_size={self.MMAP_SIZE}")
+        # Idempotent, so processes opening the cache at the same time do not conflict
+        self.conn.executescript(self.SCHEMA)
+
+    def close(self):
+        self.flush()
+        self.conn.close()
+
+    @contextmanager
+    def _transaction(self) -> Iterator[sqlite3.Connection]:
+        with self._lock:
+            self.conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield self.conn
+            except BaseException:
+                self.conn.execute("ROLLBACK")
+                raise
+            self.conn.execute("COMMIT")
+
+    def get_many(self, product_ids: Iterable[str]) -> Dict[str, Any]:
+        """Cached payloads of the given ids (fresh entries only). Counts hits and misses (buffered)."""
+        ids = sorted({str(pid) for pid in product_ids})
+        if not ids:
+            return {}
+        now = time.time()
+        found: Dict[str, Any] = {}
+        with self._lock:
+            # One read transaction, so all chunks see the same snapshot
+            self.conn.execute("BEGIN")
+            try:
+                for chunk in _chunks(ids):
+                    rows = self.conn.execute(
+                        f"SELECT product_id, payload FROM products WHERE fetched_at >= ? "
+                        f"AND product_id IN ({','.join('?' * len(chunk))})",
+                        [now - self.max_age] + chunk,
+                    ).fetchall()
+                    for pid, payload in rows:
+                        found[pid] = json.loads(payload)
+            finally:
+                self.conn.execute("COMMIT")
+            self._pending_used.update((pid, now) for pid in found)
+            for name, delta in (("hits", len(found)), ("misses", len(ids) - len(found))):
+                self._pending_counts[name] = self._pending_counts.get(name, 0) + delta
+        if len(self._pending_used) >= self.FLUSH_PENDING:
+            self.flush()
+        return found
+
+    def flush(self):
+        """Writes buffered lookup recency and counters."""
+        if not self._pending_counts:
+            return
+        with self._transaction() as conn:
+            self._write_pending(conn)
+
+    def _write_pending(self, conn: sqlite3.Connection):
+        # Entries evicted since they were read are simply not updated
+        conn.executemany("UPDATE products SET last_used = ? WHERE product_id = ?",
+                         [(used, pid) for pid, used in self._pending_used.items()])
+        self._count(conn, **self._pending_counts)
+        self._pending_used.clear()
+        self._pending_counts.clear()
+
+    def contains(self, product_ids: Iterable[str]) -> Set[str]:
+        """Ids with a fresh entry. Read-only: counters and recency are not touched."""
+        ids = sorted({str(pid) for pid in product_ids})
+        found: Set[str] = set()
+        with self._lock:
+            for chunk in _chunks(ids):
+                rows = self.conn.execute(
+                    f"SELECT product_id FROM products WHERE fetched_at >= ? "
+                    f"AND product_id IN ({','.join('?' * len(chunk))})",
+                    [time.time() - self.max_age] + chunk,
+                ).fetchall()
+                found.update(pid for (pid,) in rows)
+        return found
+
+    def put_many(self, payloads: Dict[str, Any]):
+        """Stores payloads and evicts expired and least recently used entries over the limit."""
+        if not payloads:
+            self.flush()
+            return
+        now = time.time()
+        with self._transaction() as conn:
+            # Recency first, so entries just read are not the ones evicted
+            self._write_pending(conn)
+            conn.executemany(
+                "INSERT OR REPLACE INTO products (product_id, payload, fetched_at, last_used) VALUES (?, ?, ?, ?)",
+                [(str(pid), json.dumps(p, ensure_ascii=False), now, now) for pid, p in payloads.items()],
+            )
+            evicted = conn.execute("DELETE FROM products WHERE fetched_at < ?", (now - self.max_age,)).rowcount
+            evicted += conn.execute(
+                "DELETE FROM products WHERE product_id IN ("
+                "SELECT product_id FROM products ORDER BY last_used LIMIT "
+                "max(0, (SELECT COUNT(*) FROM products) - ?))",
+                (self.max_entries,),
+            ).rowcount
+            self._count(conn, stores=len(payloads), evictions=evicted)
+        if evicted:
+            self.logger.debug(f"Evicted {evicted} products from the shared cache")
+
+    def stats(self) -> SharedCacheStats:
+        self.flush()
+        with self._lock:
+            counters = dict(self.conn.execute("SELECT name, value FROM stats").fetchall())
+            entries = self.conn.execute("SELECT COUNT(*) FROM products").fetchone()[0]
+        return SharedCacheStats(entries=entries, **counters)
+
+    def _count(self, conn: sqlite3.Connection, **deltas: int):
+        conn.executemany("UPDATE stats SET value = value + ? WHERE name = ?",
+                         [(v, k) for k, v in deltas.items() if v])
+
+def _chunks(ids: list, size: int = 500) -> Iterator[list]:
+    # Stays below SQLite's default limit of bound parameters per statement
+    for i in range(0, len(ids), size):
+        yield ids[i:i + size]
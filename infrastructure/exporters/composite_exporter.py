@@ -0,0 +1,40 @@
+import concurrent.futures
+import logging
+from typing import List, Optional
+from domain.interfaces import IExporter
+from domain.models import DayLog
+
+class CompositeExporter(IExporter):
+    """Runs several exporters concurrently over the same in-memory dataset."""
+
+    def __init__(self, exporters: List[IExporter], max_workers: Optional[int] = None):
+        if not exporters:
+            raise ValueError("CompositeExporter requires at least one exporter.")
+        self.exporters = list(exporters)
+        self.max_workers = max_workers or len(self.exporters)
+        self.logger = logging.getLogger(__name__)
+
+    def export(self, data: List[DayLog], output_dir: str) -> List[str]:
+        # Exporters only read `data`, so the same list is shared between threads
+        results: List[List[str]] = [[] for _ in self.exporters]
+        errors = []
+
+        with concurrent.futures.ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            future_to_index = {
+                executor.submit(exporter.export, data, output_dir): i
+                for i, exporter in enumerate(self.exporters)
+            }
+            for future in concurrent.futures.as_completed(future_to_index):
+                i = future_to_index[future]
+                try:
+                    results[i] = future.result()
+                except Exception as e:
+                    name = type(self.exporters[i]).__name__
+                    self.logger.error(f"{name} failed: {e}")
+                    errors.append(f"{name}: {e}")
+
+        if errors:
+            raise RuntimeError(f"Export failed for {len(errors)} exporter(s): {'; '.join(errors)}")
+
+        # Keep output order stable regardless of completion order
+        return [path for files in results for path in files]
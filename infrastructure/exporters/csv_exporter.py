@@ -1,98 +1,308 @@
+import concurrent.futures
 import csv
+import io
+import logging
 from pathlib import Path
-from typing import List, Dict
+from typing import List, Dict, Optional, Callable, Tuple
 from domain.interfaces import IExporter
-from domain.models import DayLog
+from domain.models import DayLog, Nutrients
+from infrastructure.exporters.file_output import COMPRESSIONS, atomic_write, compressed_name, validate_compression
+from infrastructure.exporters.incremental import IncrementalIndex
+
+NUTRITION_LOG_FIELDS = [
+    "date", "meal", "product_name", "amount_g",
+    "calories", "protein_g", "fat_g", "carbs_g"
+]
+MEAL_SUMMARY_FIELDS = ["date", "meal", "calories"]
+DAILY_SUMMARY_FIELDS = ["date", "calories", "protein_g", "fat_g", "carbs_g"]
+
+# Star layout: dimensions written once per key, plus a compact fact table
+PRODUCTS_FIELDS = ["product_id", "product_name", "calories_per_g", "protein_per_g", "fat_per_g", "carbs_per_g"]
+MEALS_FIELDS = ["meal_code", "meal"]
+CONSUMPTION_FIELDS = ["date", "meal_code", "product_id", "amount_g"]
+
+# Same codes as the API's numeric daytime slots
+MEAL_CODES = {"Café da manhã": 0, "Almoço": 1, "Jantar": 2, "Lanches": 3}
+
+# Files written only by one layout, and by both. Any of them (in any compression) that an
+# export does not write is removed, since it would look current but be stale
+LAYOUT_FILES = {"flat": ["nutrition_log.csv"], "star": ["products.csv", "meals.csv", "consumption.csv"]}
+SUMMARY_FILES = ["meal_summary.csv", "daily_summary.csv"]
+
+# What the summaries are computed from: (meal slot, per-gram nutrients, grams) per item
+SummaryEntry = Tuple[str, Nutrients, float]
 
 class CsvExporter(IExporter):
+    LAYOUT_FLAT = "flat"
+    LAYOUT_STAR = "star"
+    LAYOUTS = (LAYOUT_FLAT, LAYOUT_STAR)
+
+    def __init__(self, parallel: bool = True, compression: Optional[str] = None,
+                 compression_level: Optional[int] = None, incremental: bool = False,
+                 layout: str = LAYOUT_FLAT):
+        """
+        Args:
+            parallel: Write the CSV files concurrently.
+            compression: None, "gzip" (.csv.gz) or "zstd" (.csv.zst, needs `zstandard`).
+            compression_level: Compressor level; defaults to 6 for gzip and 3 for zstd.
+            incremental: Keep a sidecar index of per-date byte offsets and only rewrite
+                the files from the first changed date onwards. Dates missing from the
+                exported data are left untouched. Not available with compression.
+            layout: "flat" writes nutrition_log.csv with names and macros repeated on every row.
+                "star" writes products.csv (one row per product, per-gram nutrients) and
+                meals.csv dimensions plus a compact consumption.csv fact table
+                (date, meal_code, product_id, amount_g, unrounded) instead, and derives
+                the summaries from those rows. meal_summary.csv and daily_summary.csv are
+                written in both layouts. Files left by the other layout or by another
+                compression setting are deleted.
+        """
+        if layout not in self.LAYOUTS:
+            raise ValueError(f"Unknown layout '{layout}'. Expected one of: {', '.join(self.LAYOUTS)}")
+        validate_compression(compression, compression_level)
+        if incremental and compression:
+            raise ValueError("Incremental CSV export cannot be combined with compression.")
+        self.parallel = parallel
+        self.compression = compression
+        self.compression_level = compression_level
+        self.incremental = incremental
+        self.layout = layout
+        self.logger = logging.getLogger(__name__)
+
     def export(self, data: List[DayLog], output_dir: str) -> List[str]:
         output_path = Path(output_dir)
         output_path.mkdir(parents=True, exist_ok=True)
 
-        created_files = []
+        days = sorted(data, key=lambda d: d.date)
 
-        # 1. nutrition_log.csv
-        log_path = output_path / "nutrition_log.csv"
-        self._write_nutrition_log(data, log_path)
-        created_files.append(str(log_path))
+        # Per-date tables: (file, header, rows for one day)
+        tables = []
+        # Dimension tables: (file, header, key column, all rows)
+        dimensions = []
 
-        # 2. meal_summary.csv
-        meal_path = output_path / "meal_summary.csv"
-        self._write_meal_summary(data, meal_path)
-        created_files.append(str(meal_path))
+        if self.layout == self.LAYOUT_STAR:
+            meal_codes = self._meal_codes(days, output_path)
+            product_rows = self._product_rows(days)
+            dimensions.append((output_path / self._file_name("products.csv"), PRODUCTS_FIELDS,
+                               "product_id", product_rows))
+            dimensions.append((output_path / self._file_name("meals.csv"), MEALS_FIELDS, "meal_code",
+                               [{"meal_code": c, "meal": m} for m, c in meal_codes.items()]))
+            facts = {day.date: self._consumption_rows(day, meal_codes) for day in days}
+            tables.append((output_path / self._file_name("consumption.csv"), CONSUMPTION_FIELDS,
+                           lambda day: facts[day.date]))
+            # Summaries come from the fact rows, so they always match a join of the star files
+            products = {row["product_id"]: row for row in product_rows}
+            meal_names = {c: m for m, c in meal_codes.items()}
+            entries_for = lambda day: self._fact_entries(facts[day.date], products, meal_names)
+        else:
+            tables.append((output_path / self._file_name("nutrition_log.csv"), NUTRITION_LOG_FIELDS,
+                           self._nutrition_log_rows))
+            entries_for = self._item_entries
 
-        # 3. daily_summary.csv
-        daily_path = output_path / "daily_summary.csv"
-        self._write_daily_summary(data, daily_path)
-        created_files.append(str(daily_path))
+        tables += [
+            (output_path / self._file_name("meal_summary.csv"), MEAL_SUMMARY_FIELDS,
+             lambda day: self._meal_summary_rows(day, entries_for(day))),
+            (output_path / self._file_name("daily_summary.csv"), DAILY_SUMMARY_FIELDS,
+             lambda day: self._daily_summary_rows(day, entries_for(day))),
+        ]
+        self._remove_stale_files(output_path, {d[0] for d in dimensions} | {t[0] for t in tables})
 
-        return created_files
+        index = None
+        if self.incremental:
+            index = IncrementalIndex(output_path)
+            index.invalidate()
 
-    def _write_nutrition_log(self, days: List[DayLog], path: Path):
-        with open(path, "w", newline="", encoding="utf-8") as f:
-            writer = csv.DictWriter(f, fieldnames=[
-                "date", "meal", "product_name", "amount_g",
-                "calories", "protein_g", "fat_g", "carbs_g"
-            ])
-            writer.writeheader()
+        def write(table):
+            path, fields, rows_for = table
+            if index is not None:
+                self._write_incremental(index, path, fields, rows_for, days)
+            else:
+                # Written to a temp file and renamed into place once complete
+                self._write_table(path, fields, rows_for, days)
+
+        def write_dimension(dimension):
+            path, fields, key, rows = dimension
+            # Incremental exports may cover only recent days; keep keys used by older facts
+            self._write_dimension(path, fields, key, rows, merge_existing=self.incremental)
 
+        jobs = [(write_dimension, d) for d in dimensions] + [(write, t) for t in tables]
+        if self.parallel:
+            with concurrent.futures.ThreadPoolExecutor(max_workers=len(jobs)) as executor:
+                futures = [executor.submit(fn, arg) for fn, arg in jobs]
+                # Wait for all writers, then re-raise the first failure
+                concurrent.futures.wait(futures)
+                for future in futures:
+                    future.result()
+        else:
+            for fn, arg in jobs:
+                fn(arg)
+
+        if index is not None:
+            index.save()
+
+        return [str(d[0]) for d in dimensions] + [str(t[0]) for t in tables]
+
+    def _file_name(self, name: str) -> str:
+        return compressed_name(name, self.compression)
+
+    def _remove_stale_files(self, output_path: Path, written: set):
+        # E.g. nutrition_log.csv after switching to the star layout, or daily_summary.csv.gz
+        # after switching compression off
+        names = [name for layout_names in LAYOUT_FILES.values() for name in layout_names] + SUMMARY_FILES
+        for name in names:
+            for compression in (None, *COMPRESSIONS):
+                path = output_path / compressed_name(name, compression)
+                if path not in written and path.exists():
+                    path.unlink()
+                    self.logger.info(f"Removed stale {path.name} left by an earlier export")
+
+    def _write_table(self, path: Path, fields: List[str],
+                     rows_for: Callable[[DayLog], List[Dict]], days: List[DayLog]):
+        with atomic_write(path, compression=self.compression, level=self.compression_level) as f:
+            writer = csv.DictWriter(f, fieldnames=fields)
+            writer.writeheader()
             for day in days:
-                for item in day.consumed_items:
-                    # Calculate values for this specific amount
-                    n = item.product.nutrients
-                    # Assuming nutrients are per gram as established
-                    amt = item.amount_grams
-
-                    writer.writerow({
-                        "date": day.date.strftime("%Y-%m-%d"),
-                        "meal": item.meal_slot,
-                        "product_name": item.product.name,
-                        "amount_g": round(amt, 1),
-                        "calories": round(n.calories * amt, 1),
-                        "protein_g": round(n.protein * amt, 1),
-                        "fat_g": round(n.fat * amt, 1),
-                        "carbs_g": round(n.carbs * amt, 1)
-                    })
-
-    def _write_meal_summary(self, days: List[DayLog], path: Path):
-        # Dictionary to aggregate: (date, meal) -> calories
-        summary: Dict[tuple, float] = {}
+                writer.writerows(rows_for(day))
+
+    def _write_dimension(self, path: Path, fields: List[str], key: str, rows: List[Dict],
+                         merge_existing: bool):
+        merged: Dict[str, Dict] = {}
+        if merge_existing and path.exists():
+            merged = {row[key]: row for row in self._read_rows(path)}
+        for row in rows:
+            merged[str(row[key])] = row
+
+        with atomic_write(path, compression=self.compression, level=self.compression_level) as f:
+            writer = csv.DictWriter(f, fieldnames=fields)
+            writer.writeheader()
+            writer.writerows(merged[k] for k in sorted(merged))
 
+    def _read_rows(self, path: Path) -> List[Dict]:
+        # Only used in incremental mode, which never compresses
+        with open(path, "r", newline="", encoding="utf-8") as f:
+            return list(csv.DictReader(f))
+
+    def _write_incremental(self, index: IncrementalIndex, path: Path, fields: List[str],
+                           rows_for: Callable[[DayLog], List[Dict]], days: List[DayLog]):
+        buf = io.StringIO(newline="")
+        writer = csv.DictWriter(buf, fieldnames=fields)
+
+        def take() -> bytes:
+            text = buf.getvalue()
+            buf.seek(0)
+            buf.truncate()
+            return text.encode("utf-8")
+
+        writer.writeheader()
+        header = take()
+
+        chunks = []
+        for day in days:
+            writer.writerows(rows_for(day))
+            chunks.append((day.date.strftime("%Y-%m-%d"), take()))
+
+        patched = index.write(path, header, chunks)
+        self.logger.info(f"{path.name}: {'updated in place' if patched else 'written in full'}")
+
+    def _nutrition_log_rows(self, day: DayLog) -> List[Dict]:
+        rows = []
+        date_str = day.date.strftime("%Y-%m-%d")
+        for item in day.consumed_items:
+            # Calculate values for this specific amount
+            n = item.product.nutrients
+            # Assuming nutrients are per gram as established
+            amt = item.amount_grams
+
+            rows.append({
+                "date": date_str,
+                "meal": item.meal_slot,
+                "product_name": item.product.name,
+                "amount_g": round(amt, 1),
+                "calories": round(n.calories * amt, 1),
+                "protein_g": round(n.protein * amt, 1),
+                "fat_g": round(n.fat * amt, 1),
+                "carbs_g": round(n.carbs * amt, 1)
+            })
+        return rows
+
+    def _product_rows(self, days: List[DayLog]) -> List[Dict]:
+        products: Dict[str, Dict] = {}
         for day in days:
-            date_str = day.date.strftime("%Y-%m-%d")
             for item in day.consumed_items:
-                key = (date_str, item.meal_slot)
-                cal = item.product.nutrients.calories * item.amount_grams
-                summary[key] = summary.get(key, 0.0) + cal
+                key = item.product.key
+                if key in products:
+                    continue
+                n = item.product.nutrients
+                # Per-gram values are kept unrounded so facts can be recomputed exactly
+                products[key] = {
+                    "product_id": key,
+                    "product_name": item.product.name,
+                    "calories_per_g": n.calories,
+                    "protein_per_g": n.protein,
+                    "fat_per_g": n.fat,
+                    "carbs_per_g": n.carbs,
+                }
+        return list(products.values())
 
-        with open(path, "w", newline="", encoding="utf-8") as f:
-            writer = csv.DictWriter(f, fieldnames=["date", "meal", "calories"])
-            writer.writeheader()
+    def _meal_codes(self, days: List[DayLog], output_path: Path) -> Dict[str, int]:
+        codes = dict(MEAL_CODES)
+        # Keep codes assigned to unknown slots by earlier incremental exports stable
+        meals_path = output_path / self._file_name("meals.csv")
+        if self.incremental and meals_path.exists():
+            for row in self._read_rows(meals_path):
+                codes.setdefault(row["meal"], int(row["meal_code"]))
 
-            # Sort by date then meal??
-            # Sorting logic: Date asc, then meal order?
-            # Meal slot is string, so sorting might be alphabetical if not careful.
-            # Let's just sort by date key.
-            for (d, m), cal in sorted(summary.items()):
-                writer.writerow({
-                    "date": d,
-                    "meal": m,
-                    "calories": round(cal, 1)
-                })
-
-    def _write_daily_summary(self, days: List[DayLog], path: Path):
-        with open(path, "w", newline="", encoding="utf-8") as f:
-            writer = csv.DictWriter(f, fieldnames=[
-                "date", "calories", "protein_g", "fat_g", "carbs_g"
-            ])
-            writer.writeheader()
+        for slot in sorted({item.meal_slot for day in days for item in day.consumed_items}):
+            if slot not in codes:
+                codes[slot] = max(codes.values()) + 1
+        return codes
 
-            for day in days:
-                t = day.total_nutrients
-                writer.writerow({
-                    "date": day.date.strftime("%Y-%m-%d"),
-                    "calories": round(t.calories, 1),
-                    "protein_g": round(t.protein, 1),
-                    "fat_g": round(t.fat, 1),
-                    "carbs_g": round(t.carbs, 1)
-                })
+    def _consumption_rows(self, day: DayLog, meal_codes: Dict[str, int]) -> List[Dict]:
+        date_str = day.date.strftime("%Y-%m-%d")
+        return [{
+            "date": date_str,
+            "meal_code": meal_codes[item.meal_slot],
+            "product_id": item.product.key,
+            # Unrounded, so joining with products.csv reproduces the summaries exactly
+            "amount_g": item.amount_grams,
+        } for item in day.consumed_items]
+
+    def _item_entries(self, day: DayLog) -> List[SummaryEntry]:
+        return [(item.meal_slot, item.product.nutrients, item.amount_grams) for item in day.consumed_items]
+
+    def _fact_entries(self, facts: List[Dict], products: Dict[str, Dict],
+                      meal_names: Dict[int, str]) -> List[SummaryEntry]:
+        entries = []
+        for fact in facts:
+            p = products[fact["product_id"]]
+            nutrients = Nutrients(calories=p["calories_per_g"], protein=p["protein_per_g"],
+                                  fat=p["fat_per_g"], carbs=p["carbs_per_g"])
+            entries.append((meal_names[fact["meal_code"]], nutrients, fact["amount_g"]))
+        return entries
+
+    def _meal_summary_rows(self, day: DayLog, entries: List[SummaryEntry]) -> List[Dict]:
+        # Dictionary to aggregate: meal -> calories
+        summary: Dict[str, float] = {}
+        for meal, n, grams in entries:
+            summary[meal] = summary.get(meal, 0.0) + n.calories * grams
+
+        # Days are written in date order; within a day meals are sorted by name
+        date_str = day.date.strftime("%Y-%m-%d")
+        return [
+            {"date": date_str, "meal": m, "calories": round(cal, 1)}
+            for m, cal in sorted(summary.items())
+        ]
+
+    def _daily_summary_rows(self, day: DayLog, entries: List[SummaryEntry]) -> List[Dict]:
+        t = Nutrients()
+        for _, n, grams in entries:
+            t.calories += n.calories * grams
+            t.protein += n.protein * grams
+            t.fat += n.fat * grams
+            t.carbs += n.carbs * grams
+        return [{
+            "date": day.date.strftime("%Y-%m-%d"),
+            "calories": round(t.calories, 1),
+            "protein_g": round(t.protein, 1),
+            "fat_g": round(t.fat, 1),
+            "carbs_g": round(t.carbs, 1)
+        }]
@@ -0,0 +1,99 @@
+import gzip
+import io
+import os
+import tempfile
+from contextlib import contextmanager
+from pathlib import Path
+from typing import IO, Iterator, Optional
+
+# Supported output compressions -> (file suffix, default level)
+COMPRESSIONS = {
+    "gzip": (".gz", 6),
+    "zstd": (".zst", 3),
+}
+
+def validate_compression(compression: Optional[str], level: Optional[int] = None):
+    """Raises ValueError/ImportError if the compression settings cannot be used."""
+    if compression is None:
+        return
+    if compression not in COMPRESSIONS:
+        raise ValueError(
+            f"Unknown compression '{compression}'. Expected one of: {', '.join(COMPRESSIONS)}"
+        )
+    if level is not None:
+        low, high = (0, 9) if compression == "gzip" else (1, 22)
+        if not low <= level <= high:
+            raise ValueError(f"{compression} level must be between {low} and {high}, got {level}")
+    if compression == "zstd":
+        _import_zstd()
+
+def compressed_name(filename: str, compression: Optional[str]) -> str:
+    """Appends the compression suffix, e.g. nutrition_log.csv -> nutrition_log.csv.gz."""
+    if compression is None:
+        return filename
+    return filename + COMPRESSIONS[compression][0]
+
+def _import_zstd():
+    try:
+        import zstandard
+    except ImportError:
+        raise ImportError("zstd compression requires the 'zstandard' package (pip install zstandard)")
+    return zstandard
+
+@contextmanager
+def atomic_write(path: Path, encoding: str = "utf-8", newline: str = "",
+                 compression: Optional[str] = None, level: Optional[int] = None) -> Iterator[IO[str]]:
+    """
+    Opens a temp file next to `path` for writing and renames it over `path` on success.
+    Readers either see the previous file or the complete new one, never a partial write.
+    On error the temp file is removed and the destination is left untouched.
+
+    With `compression` set ("gzip" or "zstd"), text is streamed through the compressor
+    instead of being buffered, so memory use does not grow with the output size.
+    """
+    path = Path(path)
+    validate_compression(compression, level)
+    fd, tmp_name = tempfile.mkstemp(dir=str(path.parent), prefix=f".{path.name}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as raw:
+            with _text_stream(raw, encoding, newline, compression, level) as f:
+                yield f
+            raw.flush()
+            os.fsync(raw.fileno())
+        # mkstemp creates owner-only files; keep the permissions a plain open() would give
+        os.chmod(tmp_name, path.stat().st_mode & 0o777 if path.exists() else 0o644)
+        os.replace(tmp_name, path)
+    except BaseException:
+        try:
+            os.unlink(tmp_name)
+        except FileNotFoundError:
+            pass
+        raise
+
+@contextmanager
+def _text_stream(raw: IO[bytes], encoding: str, newline: str,
+                 compression: Optional[str], level: Optional[int]) -> Iterator[IO[str]]:
+    """Wraps `raw` in an (optionally compressing) text stream without closing `raw`."""
+    if compression is None:
+        stream = io.TextIOWrapper(raw, encoding=encoding, newline=newline)
+        try:
+            yield stream
+            stream.flush()
+        finally:
+            # Detach so closing the wrapper does not close the underlying file
+            stream.detach()
+        return
+
+    if level is None:
+        level = COMPRESSIONS[compression][1]
+
+    if compression == "gzip":
+        # mtime=0 keeps output byte-identical for identical input
+        compressor = gzip.GzipFile(filename="", mode="wb", fileobj=raw, compresslevel=level, mtime=0)
+    else:
+        zstandard = _import_zstd()
+        compressor = zstandard.ZstdCompressor(level=level).stream_writer(raw, closefd=False)
+
+    # Closing the text wrapper closes the compressor, which writes the trailer but leaves `raw` open
+    with io.TextIOWrapper(compressor, encoding=encoding, newline=newline) as stream:
+        yield stream
@@ -0,0 +1,152 @@
+import hashlib
+import json
+import logging
+import os
+import threading
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+from infrastructure.exporters.file_output import atomic_write
+
+# A file's body as an ordered list of (date string, encoded rows for that date)
+Chunks = List[Tuple[str, bytes]]
+
+class IncrementalIndex:
+    """
+    Sidecar index for append/upsert CSV exports.
+
+    For every managed file it stores the header and, per date, the byte offset, length
+    and content hash of that date's rows. Files are kept sorted by date, so on the next
+    export only the region from the first changed date onwards has to be rewritten.
+    """
+    FILE_NAME = ".csv_export_index.json"
+    VERSION = 1
+
+    def __init__(self, output_dir: Path):
+        self.path = Path(output_dir) / self.FILE_NAME
+        self.logger = logging.getLogger(__name__)
+        self._lock = threading.Lock()
+        self._files: Dict[str, Dict] = {}
+        self._load()
+
+    def _load(self):
+        if not self.path.exists():
+            return
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                raw = json.load(f)
+            if raw.get("version") == self.VERSION:
+                self._files = raw.get("files", {})
+        except (OSError, ValueError) as e:
+            self.logger.warning(f"Ignoring unreadable export index {self.path}: {e}")
+
+    def save(self):
+        with self._lock:
+            with atomic_write(self.path) as f:
+                json.dump({"version": self.VERSION, "files": self._files}, f)
+
+    def invalidate(self):
+        """Drops the index on disk before files are modified, so a crash mid-export forces a full rewrite."""
+        try:
+            os.unlink(self.path)
+        except FileNotFoundError:
+            pass
+
+    def write(self, path: Path, header: bytes, chunks: Chunks) -> bool:
+        """
+        Brings `path` up to date with `chunks`: dates in `chunks` are replaced (an empty
+        body removes that date's rows) and every other date is kept as it is on disk.
+        Dates missing from `chunks` are unknown rather than empty (e.g. days that failed
+        to fetch or were skipped), so their rows are never dropped.
+
+        Returns True if the file was patched in place, False if it was fully rewritten.
+        """
+        with self._lock:
+            entry = self._files.get(path.name)
+        entry = entry if self._is_valid(path, header, entry) else None
+
+        if entry is None:
+            new_entry = self._rewrite(path, header, chunks)
+            patched = False
+        else:
+            new_entry = self._patch(path, header, chunks, entry)
+            patched = True
+
+        with self._lock:
+            self._files[path.name] = new_entry
+        return patched
+
+    def _is_valid(self, path: Path, header: bytes, entry: Optional[Dict]) -> bool:
+        if not entry or not path.exists():
+            return False
+        if entry.get("header") != _digest(header):
+            return False
+        days = entry.get("days", [])
+        expected_size = days[-1][1] + days[-1][2] if days else len(header)
+        return path.stat().st_size == expected_size
+
+    def _rewrite(self, path: Path, header: bytes, chunks: Chunks) -> Dict:
+        days = []
+        offset = len(header)
+        with atomic_write(path, newline="") as f:
+            # Chunks are already encoded; write through the underlying binary buffer
+            f.buffer.write(header)
+            for date_str, body in chunks:
+                f.buffer.write(body)
+                days.append([date_str, offset, len(body), _digest(body)])
+                offset += len(body)
+        return {"header": _digest(header), "days": days}
+
+    def _patch(self, path: Path, header: bytes, chunks: Chunks, entry: Dict) -> Dict:
+        old_days = entry["days"]
+        new_bodies = dict(chunks)
+
+        # Merge: dates in `chunks` take the new rows, all other dates keep their on-disk rows
+        merged = []  # (date, body or None for "keep on-disk bytes", old entry or None)
+        old_by_date = {d[0]: d for d in old_days}
+        for date_str in sorted(set(old_by_date) | set(new_bodies)):
+            if date_str in new_bodies:
+                merged.append((date_str, new_bodies[date_str], old_by_date.get(date_str)))
+            else:
+                merged.append((date_str, None, old_by_date[date_str]))
+
+        # Find the first position where the merged layout diverges from the file
+        split = 0
+        while split < len(merged) and split < len(old_days):
+            date_str, body, old = merged[split]
+            if old is not old_days[split]:
+                break
+            if body is not None and _digest(body) != old[3]:
+                break
+            split += 1
+
+        if split == len(merged) and split == len(old_days):
+            return entry
+
+        cut = old_days[split][1] if split < len(old_days) else (
+            old_days[-1][1] + old_days[-1][2] if old_days else len(header))
+
+        with open(path, "r+b") as f:
+            # Read kept on-disk rows after the cut before truncating
+            tail = []
+            for date_str, body, old in merged[split:]:
+                if body is None:
+                    f.seek(old[1])
+                    body = f.read(old[2])
+                tail.append((date_str, body))
+
+            f.seek(cut)
+            f.truncate()
+            days = [list(d) for d in old_days[:split]]
+            offset = cut
+            for date_str, body in tail:
+                f.write(body)
+                days.append([date_str, offset, len(body), _digest(body)])
+                offset += len(body)
+            f.flush()
+            os.fsync(f.fileno())
+
+        self.logger.debug(f"{path.name}: rewrote {len(tail)} date(s) from byte {cut}")
+        return {"header": _digest(header), "days": days}
+
+def _digest(data: bytes) -> str:
+    return hashlib.sha1(data).hexdigest()
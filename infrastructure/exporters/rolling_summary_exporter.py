@@ -0,0 +1,87 @@
+import csv
+from datetime import timedelta
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+from domain.analytics import NutritionHistory, NUTRIENT_FIELDS
+from domain.interfaces import IExporter
+from domain.models import DayLog
+from infrastructure.exporters.file_output import atomic_write, compressed_name, validate_compression
+
+# Column names used in the CSV for each nutrient (matches daily_summary.csv)
+COLUMN_NAMES = {"calories": "calories", "protein": "protein_g", "fat": "fat_g", "carbs": "carbs_g"}
+
+class RollingSummaryExporter(IExporter):
+    """
+    Writes rolling_summary.csv: per calendar day, the day's totals, rolling averages over
+    each window, week-to-date totals and macro energy ratios.
+
+    Backed by one NutritionHistory per output folder (one account's exports), kept
+    between exports so repeated exports only add the new days instead of rescanning the
+    whole history. Every day of an export's range is replaced, so days that disappeared
+    from the data are cleared.
+    """
+
+    def __init__(self, windows: Tuple[int, ...] = (7, 30), compression: Optional[str] = None,
+                 compression_level: Optional[int] = None):
+        validate_compression(compression, compression_level)
+        self.windows = windows
+        self.compression = compression
+        self.compression_level = compression_level
+        # Resolved output folder -> history of the exports written there
+        self.histories: Dict[Path, NutritionHistory] = {}
+
+    def export(self, data: List[DayLog], output_dir: str) -> List[str]:
+        output_path = Path(output_dir)
+        output_path.mkdir(parents=True, exist_ok=True)
+        if not data:
+            return []
+
+        start = min(d.date for d in data)
+        end = max(d.date for d in data)
+        history = self.histories.setdefault(output_path.resolve(), NutritionHistory())
+        # Days of the range without data (e.g. now 404) must not keep their old values
+        by_date = {d.date: d for d in data}
+        history.update([
+            by_date.get(start + timedelta(days=i)) or DayLog(date=start + timedelta(days=i))
+            for i in range((end - start).days + 1)
+        ])
+
+        fields = ["date", "logged"]
+        fields += [COLUMN_NAMES[n] for n in NUTRIENT_FIELDS]
+        for window in self.windows:
+            fields += [f"{COLUMN_NAMES[n]}_{window}d_avg" for n in NUTRIENT_FIELDS]
+        fields += [f"week_{COLUMN_NAMES[n]}" for n in NUTRIENT_FIELDS]
+        fields += ["protein_pct", "fat_pct", "carbs_pct"]
+
+        path = output_path / compressed_name("rolling_summary.csv", self.compression)
+        with atomic_write(path, compression=self.compression, level=self.compression_level) as f:
+            writer = csv.DictWriter(f, fieldnames=fields)
+            writer.writeheader()
+
+            day = start
+            while day <= end:
+                writer.writerow(self._row(history, day, fields))
+                day += timedelta(days=1)
+
+        return [str(path)]
+
+    def _row(self, h: NutritionHistory, day, fields) -> dict:
+        row = {"date": day.strftime("%Y-%m-%d"), "logged": h.logged_days(day, day)}
+
+        for n in NUTRIENT_FIELDS:
+            row[COLUMN_NAMES[n]] = round(h.total(day, day, n), 1)
+
+        for window in self.windows:
+            for n in NUTRIENT_FIELDS:
+                avg = h.rolling_average(day, window, n)
+                row[f"{COLUMN_NAMES[n]}_{window}d_avg"] = round(avg, 1) if avg is not None else ""
+
+        # ISO week (Monday-based) totals up to and including this day
+        week_start = day - timedelta(days=day.weekday())
+        for n in NUTRIENT_FIELDS:
+            row[f"week_{COLUMN_NAMES[n]}"] = round(h.total(week_start, day, n), 1)
+
+        for n, ratio in h.macro_ratios(day, day).items():
+            row[f"{n}_pct"] = round(ratio * 100, 1) if ratio is not None else ""
+
+        return row
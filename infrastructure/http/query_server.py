@@ -0,0 +1,141 @@
+import json
+import logging
+import shutil
+from datetime import date, timedelta
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Dict, List, Optional
+from urllib.parse import urlparse, parse_qs
+from application.sync_service import AccountNotReady, SyncService
+from domain.models import DayLog
+
+def day_to_dict(day: DayLog) -> Dict:
+    return {
+        "date": day.date.isoformat(),
+        "totals": vars(day.total_nutrients),
+        "items": [{
+            "meal": item.meal_slot,
+            "product_id": item.product.id,
+            "product_name": item.product.name,
+            "amount_g": item.amount_grams,
+            "nutrients_per_g": vars(item.product.nutrients),
+        } for item in day.consumed_items],
+    }
+
+class QueryRequestHandler(BaseHTTPRequestHandler):
+    """
+    Read-only JSON API over the SyncService cache:
+
+        GET  /status
+        GET  /accounts/<name>/days?start=YYYY-MM-DD&end=YYYY-MM-DD
+        GET  /accounts/<name>/summary?start=...&end=...[&meal=...]
+        GET  /accounts/<name>/files
+        GET  /accounts/<name>/files/<file name>
+        POST /accounts/<name>/sync
+    """
+    service: SyncService = None  # set by QueryServer
+    logger = logging.getLogger(__name__)
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        parts = [p for p in url.path.split("/") if p]
+        query = parse_qs(url.query)
+        try:
+            if parts == ["status"]:
+                return self._json(self.service.status())
+
+            if len(parts) >= 3 and parts[0] == "accounts":
+                name, resource = parts[1], parts[2]
+                if resource == "days" and len(parts) == 3:
+                    start, end = self._range(query)
+                    return self._json([day_to_dict(d) for d in self.service.days(name, start, end)])
+                if resource == "summary" and len(parts) == 3:
+                    start, end = self._range(query)
+                    meal = query.get("meal", [None])[0]
+                    return self._json(self.service.summary(name, start, end, meal))
+                if resource == "files" and len(parts) == 3:
+                    return self._json([Path(p).name for p in self.service.files(name)])
+                if resource == "files" and len(parts) == 4:
+                    return self._file(name, parts[3])
+
+            self._error(HTTPStatus.NOT_FOUND, "Unknown endpoint")
+        except KeyError as e:
+            self._error(HTTPStatus.NOT_FOUND, f"Unknown account {e}")
+        except AccountNotReady as e:
+            # Not the same as "nothing logged": the data is simply not there yet
+            self._error(HTTPStatus.SERVICE_UNAVAILABLE, str(e))
+        except ValueError as e:
+            self._error(HTTPStatus.BAD_REQUEST, str(e))
+
+    def do_POST(self):
+        parts = [p for p in urlparse(self.path).path.split("/") if p]
+        if len(parts) == 3 and parts[0] == "accounts" and parts[2] == "sync":
+            try:
+                self.service.request_sync(parts[1])
+            except KeyError as e:
+                return self._error(HTTPStatus.NOT_FOUND, f"Unknown account {e}")
+            return self._json({"scheduled": parts[1]}, HTTPStatus.ACCEPTED)
+        self._error(HTTPStatus.NOT_FOUND, "Unknown endpoint")
+
+    def log_message(self, format, *args):
+        self.logger.debug("%s - %s", self.address_string(), format % args)
+
+    def _range(self, query: Dict[str, List[str]]):
+        end = self._date(query.get("end", [None])[0]) or date.today()
+        start = self._date(query.get("start", [None])[0]) or end - timedelta(days=29)
+        if start > end:
+            raise ValueError("start must not be after end")
+        return start, end
+
+    def _date(self, value: Optional[str]) -> Optional[date]:
+        if not value:
+            return None
+        try:
+            return date.fromisoformat(value)
+        except ValueError:
+            raise ValueError(f"Invalid date '{value}', expected YYYY-MM-DD")
+
+    def _file(self, name: str, file_name: str):
+        # Only files produced by the last export can be downloaded
+        matches = [p for p in self.service.files(name) if Path(p).name == file_name]
+        if not matches or not Path(matches[0]).exists():
+            return self._error(HTTPStatus.NOT_FOUND, f"Unknown file '{file_name}'")
+        path = Path(matches[0])
+        self.send_response(HTTPStatus.OK)
+        self.send_header("Content-Type", "text/csv" if path.suffix == ".csv" else "application/octet-stream")
+        self.send_header("Content-Length", str(path.stat().st_size))
+        self.end_headers()
+        with open(path, "rb") as f:
+            shutil.copyfileobj(f, self.wfile)
+
+    def _json(self, payload, status: HTTPStatus = HTTPStatus.OK):
+        body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _error(self, status: HTTPStatus, message: str):
+        self._json({"error": message}, status)
+
+class QueryServer:
+    """Serves the SyncService cache over HTTP (bind to localhost; there is no authentication)."""
+
+    def __init__(self, service: SyncService, host: str = "127.0.0.1", port: int = 8765):
+        handler = type("BoundQueryRequestHandler", (QueryRequestHandler,), {"service": service})
+        self.httpd = ThreadingHTTPServer((host, port), handler)
+        self.logger = logging.getLogger(__name__)
+
+    @property
+    def address(self):
+        return self.httpd.server_address
+
+    def serve_forever(self):
+        self.logger.info(f"Query API listening on http://{self.address[0]}:{self.address[1]}")
+        self.httpd.serve_forever()
+
+    def shutdown(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
@@ -0,0 +1,171 @@
+import logging
+import re
+import sqlite3
+import threading
+from dataclasses import dataclass, field
+from datetime import date
+from pathlib import Path
+from typing import List, Optional
+from domain.interfaces import IExporter
+from domain.models import DayLog
+
+@dataclass
+class Occurrence:
+    date: str
+    meal: str
+    amount_g: float
+    calories: float
+
+@dataclass
+class ProductMatch:
+    product_id: str
+    name: str
+    times_eaten: int
+    total_grams: float
+    total_calories: float
+    first_date: str
+    last_date: str
+    occurrences: List[Occurrence] = field(default_factory=list)
+
+class ProductIndex:
+    """
+    SQLite index of product names (FTS5 when available, LIKE otherwise) linked to every
+    consumed item by date and meal slot. Updating a day replaces that day's items, so
+    re-exporting a range keeps the index consistent.
+    """
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS products (
+            key TEXT PRIMARY KEY,
+            name TEXT NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS occurrences (
+            date TEXT NOT NULL,
+            meal TEXT NOT NULL,
+            product_key TEXT NOT NULL,
+            amount_g REAL NOT NULL,
+            calories REAL NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS idx_occurrences_product ON occurrences (product_key, date);
+        CREATE INDEX IF NOT EXISTS idx_occurrences_date ON occurrences (date);
+    """
+
+    def __init__(self, path: str):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.logger = logging.getLogger(__name__)
+        self._lock = threading.Lock()
+        self.conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        self.conn.executescript(self.SCHEMA)
+        self.has_fts = self._create_fts()
+
+    def _create_fts(self) -> bool:
+        for tokenizer in ("unicode61 remove_diacritics 2", "unicode61"):
+            try:
+                self.conn.execute(
+                    "CREATE VIRTUAL TABLE IF NOT EXISTS products_fts USING fts5("
+                    f"name, content='products', tokenize='{tokenizer}')"
+                )
+                return True
+            except sqlite3.OperationalError:
+                continue
+        self.logger.warning("SQLite has no FTS5 support; product search falls back to LIKE")
+        return False
+
+    def close(self):
+        self.conn.close()
+
+    def update(self, days: List[DayLog]):
+        """Replaces the indexed items of the given days."""
+        with self._lock, self.conn:
+            for day in days:
+                date_str = day.date.strftime("%Y-%m-%d")
+                self.conn.execute("DELETE FROM occurrences WHERE date = ?", (date_str,))
+                for item in day.consumed_items:
+                    product = item.product
+                    self._upsert_product(product.key, product.name)
+                    self.conn.execute(
+                        "INSERT INTO occurrences (date, meal, product_key, amount_g, calories) VALUES (?, ?, ?, ?, ?)",
+                        (date_str, item.meal_slot, product.key, item.amount_grams,
+                         product.nutrients.calories * item.amount_grams),
+                    )
+
+    def _upsert_product(self, key: str, name: str):
+        row = self.conn.execute("SELECT rowid, name FROM products WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            cur = self.conn.execute("INSERT INTO products (key, name) VALUES (?, ?)", (key, name))
+            if self.has_fts:
+                self.conn.execute("INSERT INTO products_fts (rowid, name) VALUES (?, ?)", (cur.lastrowid, name))
+        elif row[1] != name:
+            if self.has_fts:
+                # External-content FTS tables need the old value to delete it
+                self.conn.execute("INSERT INTO products_fts (products_fts, rowid, name) VALUES ('delete', ?, ?)",
+                                  (row[0], row[1]))
+                self.conn.execute("INSERT INTO products_fts (rowid, name) VALUES (?, ?)", (row[0], name))
+            self.conn.execute("UPDATE products SET name = ? WHERE rowid = ?", (name, row[0]))
+
+    def search(self, query: str, start: Optional[date] = None, end: Optional[date] = None,
+               limit: int = 20, occurrences: bool = True) -> List[ProductMatch]:
+        """Products whose name matches all words of `query` (prefix match), most eaten first."""
+        words = re.findall(r"\w+", query)
+        if not words:
+            return []
+
+        if self.has_fts:
+            fts_query = " ".join(f'"{w}"*' for w in words)
+            product_filter = "p.rowid IN (SELECT rowid FROM products_fts WHERE products_fts MATCH ?)"
+            params = [fts_query]
+        else:
+            product_filter = " AND ".join("p.name LIKE ?" for _ in words)
+            params = [f"%{w}%" for w in words]
+
+        date_filter, date_params = self._date_filter(start, end)
+        sql = f"""
+            SELECT p.key, p.name, COUNT(*), SUM(o.amount_g), SUM(o.calories), MIN(o.date), MAX(o.date)
+            FROM products p JOIN occurrences o ON o.product_key = p.key
+            WHERE {product_filter} {date_filter}
+            GROUP BY p.key
+            ORDER BY COUNT(*) DESC, MAX(o.date) DESC
+            LIMIT ?
+        """
+        with self._lock:
+            rows = self.conn.execute(sql, params + date_params + [limit]).fetchall()
+            matches = [ProductMatch(
+                product_id=r[0], name=r[1], times_eaten=r[2], total_grams=r[3],
+                total_calories=r[4], first_date=r[5], last_date=r[6],
+            ) for r in rows]
+
+            if occurrences:
+                for match in matches:
+                    match.occurrences = [
+                        Occurrence(date=r[0], meal=r[1], amount_g=r[2], calories=r[3])
+                        for r in self.conn.execute(
+                            f"SELECT date, meal, amount_g, calories FROM occurrences o "
+                            f"WHERE product_key = ? {date_filter} ORDER BY date",
+                            [match.product_id] + date_params,
+                        )
+                    ]
+        return matches
+
+    def _date_filter(self, start: Optional[date], end: Optional[date]):
+        clauses, params = [], []
+        if start:
+            clauses.append("AND o.date >= ?")
+            params.append(start.strftime("%Y-%m-%d"))
+        if end:
+            clauses.append("AND o.date <= ?")
+            params.append(end.strftime("%Y-%m-%d"))
+        return " ".join(clauses), params
+
+class ProductIndexExporter(IExporter):
+    """Keeps product_index.sqlite in the output folder up to date with the exported days."""
+
+    FILE_NAME = "product_index.sqlite"
+
+    def export(self, data: List[DayLog], output_dir: str) -> List[str]:
+        path = Path(output_dir) / self.FILE_NAME
+        index = ProductIndex(str(path))
+        try:
+            index.update(data)
+        finally:
+            index.close()
+        return [str(path)]
@@ -1,54 +1,292 @@
 import sys
+import argparse
+import json
 import logging
+import multiprocessing
+from dataclasses import asdict
+from datetime import date
 import tkinter as tk
 from pathlib import Path
+from typing import Optional
 
 # Infrastructure
 from infrastructure.api.yazio_client import YazioClient
 from infrastructure.services.auth_service import AuthService
 from infrastructure.services.google_oauth_service import GoogleOAuthService
 from infrastructure.exporters.csv_exporter import CsvExporter
+from infrastructure.exporters.rolling_summary_exporter import RollingSummaryExporter
+from infrastructure.exporters.composite_exporter import CompositeExporter
+
+from infrastructure.http.query_server import QueryServer
+from infrastructure.cache.negative_day_cache import NegativeDayCache
+from infrastructure.cache.latency_log import LatencyLog
+from infrastructure.cache.shared_product_cache import SharedProductCache
+from infrastructure.cache.account_dirs import account_cache_dir
+from infrastructure.index.product_index import ProductIndex, ProductIndexExporter
+from infrastructure.archive.raw_archive import RawArchive
+from infrastructure.archive.archive_client import ArchiveYazioClient
+from infrastructure.archive.parallel_rebuild import ParallelRebuilder, RebuildJob
 
 # Application
 from application.use_cases import LoginUseCase, ExportDataUseCase
+from domain.models import AuthToken
+from application.sync_service import SyncService, AccountConfig, load_sync_config
 
 # Presentation
 from ui.main_window import YazioExporterApp
 
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Yazio CSV Exporter")
+    parser.add_argument("--profile", action="store_true",
+                        help="Profile exports (CPU and memory per phase); reports are written next to the export")
+    parser.add_argument("--product-cache", metavar="PATH",
+                        help="SQLite file of product details shared by all exporter processes on this machine")
+    sub = parser.add_subparsers(dest="command")
+
+    serve = sub.add_parser("serve", help="Run as a background sync service with a local HTTP query API")
+    serve.add_argument("--config", required=True, help="JSON file with the accounts to sync")
+
+    search = sub.add_parser("search", help="Find when and how much of a product was eaten")
+    search.add_argument("query", help="Words of the product name (prefix match)")
+    search.add_argument("--index", required=True,
+                        help=f"Path to {ProductIndexExporter.FILE_NAME} (created in the output folder by exports)")
+    search.add_argument("--start", type=date.fromisoformat, help="First date (YYYY-MM-DD)")
+    search.add_argument("--end", type=date.fromisoformat, help="Last date (YYYY-MM-DD)")
+    search.add_argument("--limit", type=int, default=10, help="Maximum number of products")
+    search.add_argument("--summary", action="store_true", help="Only print totals per product")
+
+    rebuild = sub.add_parser("rebuild", help="Re-run normalization and export from the raw response archive (no network)")
+    source = rebuild.add_mutually_exclusive_group(required=True)
+    source.add_argument("--archive",
+                        help="Archive folder (archive/ in the account's data folder, or .cache/archive "
+                             "in the account's output folder for the sync service)")
+    source.add_argument("--config", help="Rebuild every account of a sync service config into its output_dir")
+    rebuild.add_argument("--output", help="Folder to write the export to (with --archive)")
+    rebuild.add_argument("--start", type=date.fromisoformat, help="First date (default: first archived day)")
+    rebuild.add_argument("--end", type=date.fromisoformat, help="Last date (default: last archived day)")
+    rebuild.add_argument("--workers", type=int, help="Worker processes (default: one per CPU)")
+
+    plan = sub.add_parser("plan", help="Dry run: estimate requests, duration and output size of an export")
+    plan.add_argument("--start", type=date.fromisoformat, required=True, help="First date (YYYY-MM-DD)")
+    plan.add_argument("--end", type=date.fromisoformat, required=True, help="Last date (YYYY-MM-DD)")
+    plan.add_argument("--config", help="Sync service config; plans for --account using its caches")
+    plan.add_argument("--account", help="Account name in --config (default: the first one)")
+    plan.add_argument("--email", help="Without --config: email of an account exported from the window")
+    plan.add_argument("--json", action="store_true", help="Print the plan as JSON")
+
+    stats = sub.add_parser("cache-stats", help="Show hit rate and size of a shared product cache")
+    stats.add_argument("path", help="Shared product cache file (see --product-cache)")
+
+    return parser.parse_args(argv)
+
+def build_exporter():
+    return CompositeExporter([CsvExporter(), RollingSummaryExporter(), ProductIndexExporter()])
+
+def build_login_use_case():
+    return LoginUseCase(AuthService(YazioClient()))
+
+def build_use_cases(cache_dir: Path, product_cache: Optional[SharedProductCache] = None):
+    """
+    Wires the client, auth and exporters used for one account. `cache_dir` must be per
+    account; `product_cache` may be shared by any number of accounts and processes.
+    """
+    # Skip product detail requests when consumed-items already carries full data,
+    # and days already known to be empty. Raw responses are archived for `rebuild`.
+    yazio_client = YazioClient(
+        hydration_policy=YazioClient.HYDRATION_MISSING,
+        negative_cache=NegativeDayCache(str(cache_dir / "empty_days.json")),
+        archive=RawArchive(str(cache_dir / "archive")),
+        latency_log=LatencyLog(str(cache_dir / "latency.json")),
+        product_cache=product_cache,
+    )
+    auth_service = AuthService(yazio_client)
+    return LoginUseCase(auth_service), ExportDataUseCase(yazio_client, build_exporter())
+
+def run_service(config_path: str, product_cache_path: Optional[str] = None):
+    config = load_sync_config(config_path)
+    product_cache_path = product_cache_path or config.product_cache
+    product_cache = SharedProductCache(product_cache_path) if product_cache_path else None
+
+    def use_cases_for(account: AccountConfig):
+        # Separate client and caches per account: sessions carry the account's bearer token.
+        # Product details are not account specific, so the shared cache is used by all.
+        return build_use_cases(Path(account.output_dir) / ".cache", product_cache)
+
+    def archived_days(account: AccountConfig, start: date, end: date):
+        # Served until the account's first sync after a restart
+        archive = RawArchive(str(Path(account.output_dir) / ".cache" / "archive"))
+        if not archive.day_dates():
+            return None
+        return ArchiveYazioClient(archive).get_days_data(None, start, end)
+
+    service = SyncService(config, use_cases_for, archive_loader=archived_days)
+    server = QueryServer(service, host=config.host, port=config.port)
+    service.start()
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.shutdown()
+        service.stop()
+
+def run_search(args):
+    if not Path(args.index).exists():
+        print(f"Index not found: {args.index}")
+        sys.exit(1)
+    index = ProductIndex(args.index)
+    try:
+        matches = index.search(args.query, start=args.start, end=args.end,
+                               limit=args.limit, occurrences=not args.summary)
+    finally:
+        index.close()
+
+    if not matches:
+        print(f"No products matching '{args.query}'.")
+        return
+    for m in matches:
+        print(f"{m.name}: {m.times_eaten}x, {m.total_grams:.0f} g, {m.total_calories:.0f} kcal "
+              f"({m.first_date} to {m.last_date})")
+        for o in m.occurrences:
+            print(f"    {o.date}  {o.meal:<15} {o.amount_g:>7.1f} g  {o.calories:>7.1f} kcal")
+
+def run_rebuild(args):
+    if args.config:
+        jobs = [
+            RebuildJob(name=a.name, archive_root=str(Path(a.output_dir) / ".cache" / "archive"),
+                       output_dir=a.output_dir, start=args.start, end=args.end)
+            for a in load_sync_config(args.config).accounts
+        ]
+    elif args.output:
+        jobs = [RebuildJob(name=Path(args.archive).name, archive_root=args.archive,
+                           output_dir=args.output, start=args.start, end=args.end)]
+    else:
+        print("--output is required with --archive")
+        sys.exit(2)
+
+    results = ParallelRebuilder(build_exporter(), max_workers=args.workers).rebuild(jobs)
+    for r in results:
+        if r.error:
+            print(f"{r.name}: failed ({r.error})")
+            continue
+        print(f"{r.name}: {r.days} days")
+        for f in r.files:
+            print(f"    Created {f}")
+    if any(r.error for r in results):
+        sys.exit(1)
+
+def run_plan(args):
+    if args.start > args.end:
+        print("--start must not be after --end")
+        sys.exit(2)
+    if args.config:
+        accounts = load_sync_config(args.config).accounts
+        matches = [a for a in accounts if a.name == args.account] if args.account else accounts[:1]
+        if not matches:
+            print(f"Unknown account '{args.account}'")
+            sys.exit(2)
+        cache_dir = Path(matches[0].output_dir) / ".cache"
+    elif args.email:
+        cache_dir = account_cache_dir(args.email)
+    else:
+        print("Pass --config (sync service accounts) or --email (accounts exported from the window)")
+        sys.exit(2)
+
+    product_cache = SharedProductCache(args.product_cache) if args.product_cache else None
+    _, export_use_case = build_use_cases(cache_dir, product_cache)
+    plan = export_use_case.plan(args.start, args.end)
+    fetch = plan.fetch
+
+    if args.json:
+        report = asdict(plan)
+        report["fetch"].pop("sample_days")
+        print(json.dumps(report, default=str, indent=2))
+        return
+
+    unknown = "unknown (nothing archived yet)"
+    print(f"Range: {plan.start_date} to {plan.end_date} ({fetch.days_total} days)")
+    print(f"Day requests: {fetch.day_requests} to the network, {fetch.days_from_cache} from local caches")
+    products = fetch.product_requests if fetch.product_requests is not None else unknown
+    print(f"Product requests: {products} to the network, {fetch.product_fetches_avoided} avoided")
+    if fetch.expected_logged_days is not None:
+        print(f"Expected logged days: {fetch.expected_logged_days}")
+    basis = f"{fetch.latency_samples} observed latencies" if fetch.latency_samples else "default latency"
+    print(f"Estimated fetch time: {fetch.estimated_seconds:.1f}s (from {basis})")
+    size = plan.estimated_output_bytes
+    print(f"Estimated output size: {size / 1024:.0f} KiB" if size is not None else f"Estimated output size: {unknown}")
+
+def run_cache_stats(path: str):
+    if not Path(path).exists():
+        print(f"Cache not found: {path}")
+        sys.exit(1)
+    cache = SharedProductCache(path)
+    try:
+        s = cache.stats()
+    finally:
+        cache.close()
+    rate = f"{s.hit_rate:.1%}" if s.hit_rate is not None else "n/a"
+    print(f"Entries: {s.entries}")
+    print(f"Hits: {s.hits}, misses: {s.misses} (hit rate {rate})")
+    print(f"Stores: {s.stores}, evictions: {s.evictions}")
+
+def get_app_dir() -> Path:
+    if hasattr(sys, '_MEIPASS'):
+        return Path(sys._MEIPASS)
+    return Path(__file__).parent
+
 def main():
+    args = parse_args()
     logging.basicConfig(level=logging.INFO, format='%(levelname)s: %(message)s')
 
+    if args.command == "serve":
+        run_service(args.config, args.product_cache)
+        return
+    if args.command == "search":
+        run_search(args)
+        return
+    if args.command == "rebuild":
+        run_rebuild(args)
+        return
+    if args.command == "plan":
+        run_plan(args)
+        return
+    if args.command == "cache-stats":
+        run_cache_stats(args.path)
+        return
+
     # Root path
-    if hasattr(sys, '_MEIPASS'):
-        app_dir = Path(sys._MEIPASS)
-    else:
-        app_dir = Path(__file__).parent
+    app_dir = get_app_dir()
 
-    # 1. Infrastructure Setup
-    yazio_client = YazioClient()
-    auth_service = AuthService(yazio_client)
+    # 1. Infrastructure and Application Setup (Use Cases)
+    product_cache = SharedProductCache(args.product_cache) if args.product_cache else None
+    export_use_cases = {}
+
+    def export_use_case_for(email: str, token: AuthToken) -> ExportDataUseCase:
+        # Caches are per account: the window can switch accounts without restarting
+        cache_dir = account_cache_dir(email, token)
+        if cache_dir not in export_use_cases:
+            export_use_cases[cache_dir] = build_use_cases(cache_dir, product_cache)[1]
+        return export_use_cases[cache_dir]
     google_service = GoogleOAuthService(
         credentials_path=str(app_dir / "google" / "credentials.json"),
         token_path=str(app_dir / "google" / "token.json")
     )
-    exporter = CsvExporter()
-
-    # 2. Application Setup (Use Cases)
-    login_use_case = LoginUseCase(auth_service)
-    export_use_case = ExportDataUseCase(yazio_client, exporter)
 
-    # 3. Presentation Setup
+    # 2. Presentation Setup
     root = tk.Tk()
     app = YazioExporterApp(
         root=root,
-        login_use_case=login_use_case,
-        export_use_case=export_use_case,
+        login_use_case=build_login_use_case(),
+        export_use_case_factory=export_use_case_for,
         google_auth_service=google_service,
-        app_dir=app_dir
+        app_dir=app_dir,
+        profile_exports=args.profile
     )
 
     # Start
     root.mainloop()
 
 if __name__ == "__main__":
+    # Frozen Windows builds re-run this script in rebuild workers; this hands them over to multiprocessing
+    multiprocessing.freeze_support()
     main()
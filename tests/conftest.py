@@ -0,0 +1,23 @@
+import sys
+from datetime import date
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import pytest
+from domain.models import ConsumedItem, DayLog, Nutrients, Product
+
+MEALS = ["Almoço", "Jantar", "Ceia"]
+
+def _make_day(day: date, items: int = 1, grams: float = 100, variant: int = 0) -> DayLog:
+    """A DayLog with `items` items of `grams` (+i) g; `variant` rotates the products and meals used."""
+    consumed = []
+    for i in range(items):
+        k = (variant + i) % 5
+        product = Product(id=f"p{k}", name=f"Food {k}",
+                          nutrients=Nutrients(calories=1.3 + k / 10, protein=0.03, fat=0.05, carbs=0.28))
+        consumed.append(ConsumedItem(product=product, amount_grams=grams + i, meal_slot=MEALS[(variant + i) % 3]))
+    return DayLog(date=day, consumed_items=consumed)
+
+@pytest.fixture
+def make_day():
+    return _make_day
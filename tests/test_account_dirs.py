@@ -0,0 +1,22 @@
+import base64
+import json
+from domain.models import AuthToken
+from infrastructure.cache.account_dirs import account_cache_dir, account_key
+
+def _jwt(sub: str) -> str:
+    payload = base64.urlsafe_b64encode(json.dumps({"sub": sub}).encode()).decode().rstrip("=")
+    return f"header.{payload}.signature"
+
+def test_accounts_get_separate_folders():
+    assert account_cache_dir("a@example.com") != account_cache_dir("b@example.com")
+    assert account_key("A@Example.com ") == account_key("a@example.com")
+
+def test_tokens_are_keyed_by_their_subject():
+    first = AuthToken(access_token=_jwt("user-1"))
+    assert account_key(token=first) == account_key(token=AuthToken(access_token=_jwt("user-1")))
+    assert account_key(token=first) != account_key(token=AuthToken(access_token=_jwt("user-2")))
+
+def test_cache_folder_is_under_the_user_data_folder(monkeypatch, tmp_path):
+    monkeypatch.setattr("sys.platform", "linux")
+    monkeypatch.setenv("XDG_DATA_HOME", str(tmp_path))
+    assert account_cache_dir("a@example.com").parent == tmp_path / "yazio-consumer" / "accounts"
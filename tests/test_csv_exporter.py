@@ -0,0 +1,85 @@
+import csv
+from datetime import date, timedelta
+from pathlib import Path
+from typing import Dict, List, Tuple
+import pytest
+from domain.models import DayLog
+from infrastructure.exporters.csv_exporter import CsvExporter
+
+START = date(2024, 1, 1)
+
+@pytest.fixture
+def day(make_day):
+    return lambda offset, version, items=2: make_day(START + timedelta(days=offset), items=items,
+                                                     grams=40 + 10 * version, variant=offset)
+
+def _files(folder: Path) -> Dict[str, bytes]:
+    return {p.name: p.read_bytes() for p in sorted(folder.glob("*.csv"))}
+
+def _check_against_full_rewrite(tmp_path: Path, layout: str, exports: List[List[DayLog]]):
+    incremental_dir, full_dir = tmp_path / "incremental", tmp_path / f"full-{len(exports)}"
+    known: Dict[date, DayLog] = {}
+    for data in exports:
+        CsvExporter(parallel=False, incremental=True, layout=layout).export(data, str(incremental_dir))
+        known.update((d.date, d) for d in data)
+    # A full rewrite of the latest data seen for every date
+    CsvExporter(parallel=False, layout=layout).export(list(known.values()), str(full_dir))
+    assert _files(incremental_dir) == _files(full_dir)
+
+def test_overlapping_exports_match_a_full_rewrite(tmp_path, day):
+    for layout in CsvExporter.LAYOUTS:
+        _check_against_full_rewrite(tmp_path / layout, layout, [
+            [day(i, 0) for i in range(0, 20)],
+            # Overlaps the first export; some days changed, one was emptied
+            [day(i, 1) for i in range(10, 25) if i != 15] + [day(15, 1, items=0)],
+            [day(i, 2) for i in range(5, 12)],
+        ])
+
+def test_days_missing_from_an_export_keep_their_rows(tmp_path, day):
+    # Days 8-11 failed to fetch (or were skipped) in the second export
+    for layout in CsvExporter.LAYOUTS:
+        _check_against_full_rewrite(tmp_path / layout, layout, [
+            [day(i, 0) for i in range(0, 20)],
+            [day(i, 1) for i in range(5, 20) if not 8 <= i <= 11],
+        ])
+
+def _rows(path: Path) -> List[Dict[str, str]]:
+    with open(path, newline="", encoding="utf-8") as f:
+        return list(csv.DictReader(f))
+
+def test_star_summaries_match_a_join_of_the_star_files(tmp_path, day):
+    # Amounts with more than one decimal would drift if consumption.csv rounded them
+    days = [day(i, 0) for i in range(6)]
+    for log in days:
+        for item in log.consumed_items:
+            item.amount_grams += 0.04
+    CsvExporter(parallel=False, layout=CsvExporter.LAYOUT_STAR).export(days, str(tmp_path))
+
+    products = {r["product_id"]: r for r in _rows(tmp_path / "products.csv")}
+    meals = {r["meal_code"]: r["meal"] for r in _rows(tmp_path / "meals.csv")}
+    joined: Dict[Tuple[str, str], float] = {}
+    for fact in _rows(tmp_path / "consumption.csv"):
+        key = (fact["date"], meals[fact["meal_code"]])
+        calories = float(products[fact["product_id"]]["calories_per_g"]) * float(fact["amount_g"])
+        joined[key] = joined.get(key, 0.0) + calories
+
+    summary = {(r["date"], r["meal"]): r["calories"] for r in _rows(tmp_path / "meal_summary.csv")}
+    assert summary == {key: str(round(cal, 1)) for key, cal in joined.items()}
+
+def test_switching_layouts_removes_the_other_layouts_files(tmp_path, day):
+    days = [day(i, 0) for i in range(3)]
+    CsvExporter(parallel=False).export(days, str(tmp_path))
+    CsvExporter(parallel=False, layout=CsvExporter.LAYOUT_STAR).export(days, str(tmp_path))
+    assert not (tmp_path / "nutrition_log.csv").exists()
+
+    CsvExporter(parallel=False).export(days, str(tmp_path))
+    assert not any((tmp_path / name).exists() for name in ("products.csv", "meals.csv", "consumption.csv"))
+    assert (tmp_path / "nutrition_log.csv").exists()
+
+def test_switching_compression_removes_the_other_variants(tmp_path, day):
+    days = [day(i, 0) for i in range(3)]
+    CsvExporter(parallel=False, compression="gzip").export(days, str(tmp_path))
+    assert (tmp_path / "daily_summary.csv.gz").exists()
+
+    created = CsvExporter(parallel=False).export(days, str(tmp_path))
+    assert sorted(p.name for p in tmp_path.iterdir()) == sorted(Path(p).name for p in created)
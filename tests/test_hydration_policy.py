@@ -0,0 +1,62 @@
+from datetime import date
+import pytest
+
+pytest.importorskip("requests")
+
+from domain.models import AuthToken
+from infrastructure.api.yazio_client import YazioClient
+
+NUTRIENTS = {"energy": 1.2, "protein": 0.1, "fat": 0.05, "carbohydrate": 0.2}
+
+def _complete(pid: str) -> dict:
+    return {"product_id": pid, "name": f"Food {pid}", "nutrients": dict(NUTRIENTS), "amount": 50, "daytime": "lunch"}
+
+def _without_fat(pid: str) -> dict:
+    item = _complete(pid)
+    del item["nutrients"]["fat"]
+    return item
+
+# "inline" is complete everywhere, "bare" has no inline data, and "mixed" is complete
+# on the first day but lacks a nutrient on the second
+DAYS = {
+    "2024-01-01": [_complete("inline"), {"product_id": "bare", "amount": 10, "daytime": "dinner"}, _complete("mixed")],
+    "2024-01-02": [_complete("inline"), _without_fat("mixed")],
+}
+
+class FakeResponse:
+    def __init__(self, status_code, payload=None):
+        self.status_code = status_code
+        self.headers = {}
+        self.text = ""
+        self._payload = payload
+
+    def json(self):
+        return self._payload
+
+class FakeSession:
+    def __init__(self):
+        self.headers = {}
+        self.products_requested = set()
+
+    def get(self, url, timeout=None, params=None):
+        if "consumed-items" in url:
+            return FakeResponse(200, {"products": DAYS[params["date"]], "simple_products": []})
+        pid = url.rsplit("/", 1)[-1]
+        self.products_requested.add(pid)
+        return FakeResponse(200, {"id": pid, "name": f"Food {pid}", "nutrients": dict(NUTRIENTS)})
+
+@pytest.mark.parametrize("policy, fetched", [
+    (YazioClient.HYDRATION_ALWAYS, {"inline", "bare", "mixed"}),
+    # A product is fetched if any of its occurrences lacks a name or an exported nutrient
+    (YazioClient.HYDRATION_MISSING, {"bare", "mixed"}),
+    (YazioClient.HYDRATION_NEVER, set()),
+])
+def test_products_fetched_under_each_policy(policy, fetched):
+    client = YazioClient(hydration_policy=policy)
+    session = client.session = client.requester.session = FakeSession()
+
+    days = client.get_days_data(AuthToken("token"), date(2024, 1, 1), date(2024, 1, 2))
+
+    assert session.products_requested == fetched
+    assert client.last_stats.product_fetches_avoided == 3 - len(fetched)
+    assert [len(d.consumed_items) for d in days] == [3, 2]
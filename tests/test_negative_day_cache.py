@@ -0,0 +1,45 @@
+import time
+from datetime import date, timedelta
+from infrastructure.cache.negative_day_cache import NegativeDayCache
+
+DAY = 86400
+
+def test_day_checked_while_recent_expires_after_it_gets_old(tmp_path):
+    cache = NegativeDayCache(str(tmp_path / "empty_days.json"))
+    recent = date.today() - timedelta(days=3)
+    cache.mark_empty(recent)
+
+    assert cache.get(recent) == NegativeDayCache.EMPTY
+    # 15 days later the day is old, but it was checked while it could still be logged
+    assert cache.get(recent, now=time.time() + 15 * DAY) is None
+
+def test_today_and_yesterday_are_never_cached(tmp_path):
+    cache = NegativeDayCache(str(tmp_path / "empty_days.json"))
+    today = date.today()
+    cache.mark_empty(today)
+    cache.mark_empty(today - timedelta(days=1))
+
+    # Meals logged between two exports an hour apart must not be skipped
+    assert cache.get(today, now=time.time() + 3600) is None
+    assert cache.get(today - timedelta(days=1)) is None
+    assert len(cache) == 0
+
+def test_day_checked_when_old_never_expires(tmp_path):
+    cache = NegativeDayCache(str(tmp_path / "empty_days.json"))
+    old = date.today() - timedelta(days=30)
+    cache.mark_empty(old, NegativeDayCache.MISSING)
+
+    assert cache.get(old, now=time.time() + 365 * DAY) == NegativeDayCache.MISSING
+
+def test_entries_survive_save_and_reload(tmp_path):
+    path = str(tmp_path / "empty_days.json")
+    cache = NegativeDayCache(path)
+    old = date.today() - timedelta(days=30)
+    cache.mark_empty(old)
+    cache.mark_empty(old - timedelta(days=1))
+    cache.mark_logged(old - timedelta(days=1))
+    cache.save()
+
+    reloaded = NegativeDayCache(path)
+    assert reloaded.get(old) == NegativeDayCache.EMPTY
+    assert reloaded.get(old - timedelta(days=1)) is None
@@ -0,0 +1,15 @@
+from infrastructure.api.normalizer import YazioNormalizer
+
+def test_inline_product_is_complete_only_with_a_name_and_every_exported_nutrient():
+    n = YazioNormalizer()
+    nutrients = {"energy": 1.2, "protein": 0.1, "fat": 0.05, "carbohydrate": 0.2}
+
+    assert n.has_complete_inline_product({"name": "Oats", "nutrients": nutrients})
+    # Nested under "product", with the API's dotted nutrient names
+    assert n.has_complete_inline_product({"product": {"name": "Oats", "nutrients": {
+        "energy.energy": 1.2, "nutrient.protein": 0.1, "nutrient.fat": 0.05, "nutrient.carb": 0.2}}})
+
+    assert not n.has_complete_inline_product({"product_id": "p1", "amount": 10})
+    assert not n.has_complete_inline_product({"name": " ", "nutrients": nutrients})
+    assert not n.has_complete_inline_product(
+        {"name": "Oats", "nutrients": {k: v for k, v in nutrients.items() if k != "fat"}})
@@ -0,0 +1,59 @@
+from datetime import date
+import pytest
+
+pytest.importorskip("requests")
+
+from domain.models import AuthToken
+from infrastructure.api.yazio_client import YazioClient
+from infrastructure.archive.raw_archive import RawArchive
+from infrastructure.cache.negative_day_cache import NegativeDayCache
+
+class FakeResponse:
+    def __init__(self, status_code, payload=None):
+        self.status_code = status_code
+        self.headers = {}
+        self.text = ""
+        self._payload = payload
+
+    def json(self):
+        return self._payload
+
+class EveryThirdDayLogged:
+    """Days 3, 6, 9, ... have one product of their own; all other days are empty."""
+
+    def __init__(self):
+        self.headers = {}
+
+    def get(self, url, timeout=None, params=None):
+        if "consumed-items" in url:
+            d = date.fromisoformat(params["date"])
+            products = [{"product_id": f"p{d.isoformat()}", "amount": 50, "daytime": "lunch"}] if d.day % 3 == 0 else []
+            return FakeResponse(200, {"products": products, "recipe_portions": [], "simple_products": []})
+        return FakeResponse(200, {"name": "Food", "nutrients": {"energy.energy": 1.2}})
+
+def _client(tmp_path) -> YazioClient:
+    client = YazioClient(hydration_policy="always",
+                         negative_cache=NegativeDayCache(str(tmp_path / "empty_days.json")),
+                         archive=RawArchive(str(tmp_path / "archive")))
+    client.session = client.requester.session = EveryThirdDayLogged()
+    return client
+
+def test_plan_extrapolates_the_logged_rate_of_all_known_days(tmp_path):
+    client = _client(tmp_path)
+    client.get_days_data(AuthToken("token"), date(2024, 1, 1), date(2024, 1, 31))
+
+    plan = client.plan_fetch(date(2024, 1, 1), date(2024, 3, 31))
+
+    assert plan.days_total == 91
+    assert plan.days_from_cache == 21  # the empty January days
+    assert plan.day_requests == 70
+    # 10 logged days in January, and 60 unknown days at January's rate of 10/31
+    assert plan.expected_logged_days == 10 + round(60 * 10 / 31)
+    assert plan.product_requests == plan.expected_logged_days
+
+def test_plan_without_local_data_leaves_products_unknown(tmp_path):
+    plan = _client(tmp_path).plan_fetch(date(2024, 1, 1), date(2024, 1, 31))
+
+    assert plan.day_requests == 31
+    assert plan.product_requests is None
+    assert plan.expected_logged_days is None
@@ -0,0 +1,61 @@
+import cProfile
+import sys
+import threading
+from application.profiling import ExportProfiler
+
+def _fib(n: int) -> int:
+    return n if n < 2 else _fib(n - 1) + _fib(n - 2)
+
+def test_worker_threads_do_not_keep_the_startup_hook(tmp_path):
+    profiler = ExportProfiler(str(tmp_path))
+    seen = []
+
+    def work():
+        _fib(15)
+        seen.append(sys.getprofile())
+
+    with profiler.phase("fetch"):
+        thread = threading.Thread(target=work)
+        thread.start()
+        thread.join()
+
+    # The hook must hand over to cProfile or remove itself, not stay installed
+    hook = seen[0]
+    assert getattr(hook, "__name__", None) != "start_thread_profiler"
+    assert profiler.write_reports()
+
+def test_worker_calls_show_up_in_the_phase_report(tmp_path):
+    profiler = ExportProfiler(str(tmp_path))
+    with profiler.phase("fetch"):
+        thread = threading.Thread(target=_fib, args=(12,))
+        thread.start()
+        thread.join()
+
+    report = (profiler.report_dir / "fetch_cpu.txt")
+    profiler.write_reports()
+    assert "_fib" in report.read_text(encoding="utf-8")
+
+def test_hook_removes_itself_when_a_thread_cannot_get_its_own_profiler(tmp_path, monkeypatch):
+    created = []
+
+    class SingleProfiler(cProfile.Profile):
+        # Behaves like Python 3.12+, where a second active profiler is refused
+        def __init__(self, *args, **kwargs):
+            super().__init__(*args, **kwargs)
+            created.append(self)
+
+        def enable(self, *args, **kwargs):
+            if threading.current_thread() is not threading.main_thread():
+                raise ValueError("Another profiling tool is already active")
+            super().enable(*args, **kwargs)
+
+    monkeypatch.setattr(ExportProfiler, "SINGLE_PROFILER_VERSION", (99,))
+    monkeypatch.setattr(cProfile, "Profile", SingleProfiler)
+    profiler = ExportProfiler(str(tmp_path))
+    with profiler.phase("fetch"):
+        thread = threading.Thread(target=_fib, args=(15,))
+        thread.start()
+        thread.join()
+
+    # The main profiler plus one attempt for the worker, not one per call event
+    assert len(created) == 2
@@ -0,0 +1,83 @@
+import threading
+import time
+import pytest
+
+pytest.importorskip("requests")
+
+from infrastructure.api import request_policy
+from infrastructure.api.request_policy import EndpointBudget, HedgePolicy, ResilientRequester, RetryPolicy
+
+URL = "https://api.example.com/v9/user/consumed-items"
+
+class FakeResponse:
+    def __init__(self, status_code, headers=None, body=""):
+        self.status_code = status_code
+        self.headers = headers or {}
+        self.text = body
+
+class FakeSession:
+    """Answers GETs from a list of (response, delay in seconds), repeating the last one."""
+
+    def __init__(self, *answers):
+        self.answers = list(answers)
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def get(self, url, timeout=None, **kwargs):
+        with self._lock:
+            answer = self.answers[min(self.calls, len(self.answers) - 1)]
+            self.calls += 1
+        resp, delay = answer if isinstance(answer, tuple) else (answer, 0)
+        if delay:
+            time.sleep(delay)
+        return resp
+
+@pytest.fixture
+def sleeps(monkeypatch):
+    """Backoff delays, recorded instead of slept."""
+    recorded = []
+    monkeypatch.setattr(request_policy.time, "sleep", recorded.append)
+    return recorded
+
+def test_server_errors_are_retried_until_the_budget_runs_out(sleeps):
+    session = FakeSession(FakeResponse(503, body="busy"))
+    requester = ResilientRequester(session, RetryPolicy(max_attempts=10),
+                                   budgets={"days": EndpointBudget(initial_tokens=2)})
+
+    resp = requester.get("days", URL, 5)
+
+    # The first attempt plus one retry per budget token; then the last response is returned
+    assert session.calls == 3
+    assert resp.status_code == 503 and resp.text == "busy"
+    assert requester.stats.retries == 2
+    assert requester.stats.budget_exhausted == 1
+
+def test_retry_after_is_honoured_up_to_max_delay(sleeps):
+    session = FakeSession(FakeResponse(429, {"Retry-After": "3"}),
+                          FakeResponse(429, {"Retry-After": "120"}),
+                          FakeResponse(200))
+    requester = ResilientRequester(session, RetryPolicy(max_attempts=4, max_delay=8.0))
+
+    assert requester.get("days", URL, 5).status_code == 200
+    assert sleeps == [3.0, 8.0]
+
+@pytest.mark.parametrize("status", [404, 401])
+def test_client_errors_are_not_retried(sleeps, status):
+    session = FakeSession(FakeResponse(status), FakeResponse(200))
+    requester = ResilientRequester(session, RetryPolicy(max_attempts=4))
+
+    assert requester.get("days", URL, 5).status_code == status
+    assert session.calls == 1
+    assert sleeps == []
+
+def test_hedge_that_answers_first_is_used_and_counted():
+    slow, fast = FakeResponse(200, body="slow"), FakeResponse(200, body="fast")
+    session = FakeSession((slow, 0.5), (fast, 0))
+    requester = ResilientRequester(session, hedge_policy=HedgePolicy(min_samples=5, min_delay=0.01))
+    requester.seed_latencies("days", [0.01] * 5)
+
+    resp = requester.get("days", URL, 5)
+
+    assert resp.text == "fast"
+    assert session.calls == 2
+    assert (requester.stats.hedges_sent, requester.stats.hedges_won) == (1, 1)
@@ -0,0 +1,32 @@
+import csv
+from datetime import date, timedelta
+import pytest
+from infrastructure.exporters.rolling_summary_exporter import RollingSummaryExporter
+
+START = date(2024, 3, 1)
+
+@pytest.fixture
+def day(make_day):
+    return lambda offset, grams=100: make_day(START + timedelta(days=offset), grams=grams)
+
+def _calories(path: str) -> dict:
+    with open(path, newline="", encoding="utf-8") as f:
+        return {row["date"]: row["calories"] for row in csv.DictReader(f)}
+
+def test_output_folders_do_not_share_history(tmp_path, day):
+    exporter = RollingSummaryExporter()
+    exporter.export([day(i) for i in range(10)], str(tmp_path / "a"))
+    [path] = exporter.export([day(9, grams=200)], str(tmp_path / "b"))
+
+    with open(path, newline="", encoding="utf-8") as f:
+        row = next(csv.DictReader(f))
+    # Only the account's own day counts towards its 7-day average
+    assert row["calories_7d_avg"] == "260.0"
+
+def test_days_missing_from_a_later_export_are_cleared(tmp_path, day):
+    exporter = RollingSummaryExporter()
+    exporter.export([day(i) for i in range(5)], str(tmp_path))
+    # Day 2 no longer exists (404), so it is absent from the new data
+    [path] = exporter.export([day(i) for i in range(5) if i != 2], str(tmp_path))
+
+    assert _calories(path)[(START + timedelta(days=2)).isoformat()] == "0.0"
@@ -0,0 +1,30 @@
+import sqlite3
+from infrastructure.cache.shared_product_cache import SharedProductCache
+
+def test_lookups_do_not_wait_for_a_writer_in_another_process(tmp_path):
+    path = str(tmp_path / "products.sqlite")
+    cache = SharedProductCache(path)
+    cache.put_many({"p1": {"name": "Oats"}})
+
+    writer = sqlite3.connect(path, isolation_level=None)
+    writer.execute("BEGIN IMMEDIATE")
+    try:
+        cache.conn.execute("PRAGMA busy_timeout=0")
+        assert cache.get_many(["p1", "p2"]) == {"p1": {"name": "Oats"}}
+    finally:
+        writer.execute("ROLLBACK")
+        writer.close()
+
+    stats = cache.stats()
+    assert (stats.hits, stats.misses, stats.stores) == (1, 1, 1)
+    cache.close()
+
+def test_recency_is_written_before_eviction(tmp_path):
+    cache = SharedProductCache(str(tmp_path / "products.sqlite"), max_entries=2)
+    cache.put_many({"old": {}})
+    cache.put_many({"newer": {}})
+    cache.get_many(["old"])
+    cache.put_many({"newest": {}})
+
+    assert set(cache.get_many(["old", "newer", "newest"])) == {"old", "newest"}
+    cache.close()
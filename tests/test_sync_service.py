@@ -0,0 +1,109 @@
+from datetime import date, timedelta
+import pytest
+from application.sync_service import AccountConfig, AccountNotReady, SyncConfig, SyncService
+from domain.models import AuthenticationError, AuthToken
+
+TODAY = date.today()
+
+class FakeLogin:
+    def __init__(self):
+        self.logins = 0
+
+    def execute_password_login(self, email, password):
+        self.logins += 1
+        return AuthToken(access_token=f"token-{self.logins}")
+
+class FakeExport:
+    def __init__(self):
+        self.days = []
+        self.failed = []
+        self.error = None
+        self.last_data = []
+        self.last_failed_days = []
+
+    def execute(self, token, start_date, end_date, output_dir):
+        if self.error:
+            raise self.error
+        self.last_data = [d for d in self.days if start_date <= d.date <= end_date]
+        self.last_failed_days = list(self.failed)
+        return []
+
+def _service(tmp_path, archive_loader=None):
+    account = AccountConfig(name="me", output_dir=str(tmp_path), email="me@example.com",
+                            password="secret", history_days=5)
+    login, export = FakeLogin(), FakeExport()
+    service = SyncService(SyncConfig(accounts=[account]), lambda a: (login, export), archive_loader)
+    return service, login, export
+
+def test_failed_days_keep_their_cached_data_and_report_an_error(tmp_path, make_day):
+    service, _, export = _service(tmp_path)
+    yesterday = TODAY - timedelta(days=1)
+    export.days = [make_day(yesterday), make_day(TODAY)]
+    service.sync("me")
+
+    export.days = [make_day(TODAY)]
+    export.failed = [yesterday]
+    service.sync("me")
+
+    assert [d.date for d in service.days("me", yesterday, TODAY)] == [yesterday, TODAY]
+    status = service.status()[0]
+    assert status["failed_days"] == [yesterday.isoformat()]
+    assert yesterday.isoformat() in status["last_error"]
+
+def test_rejected_token_is_an_error_and_forces_a_new_login(tmp_path, make_day):
+    service, login, export = _service(tmp_path)
+    export.days = [make_day(TODAY)]
+    service.sync("me")
+
+    export.error = AuthenticationError("Yazio rejected the access token (401); log in again")
+    service.sync("me")
+    assert service.status()[0]["last_error"].startswith("Yazio rejected")
+    assert service.days("me", TODAY, TODAY)
+
+    export.error = None
+    service.sync("me")
+    assert login.logins == 2
+    assert service.status()[0]["last_error"] is None
+
+def test_sync_requested_while_syncing_runs_afterwards(tmp_path):
+    service, _, export = _service(tmp_path)
+    execute = export.execute
+
+    def execute_and_request(*args):
+        # A POST /accounts/me/sync arriving mid-sync
+        service.request_sync("me")
+        return execute(*args)
+
+    export.execute = execute_and_request
+    service.sync("me")
+    assert service.accounts["me"].next_sync == 0.0
+
+    export.execute = execute
+    service.sync("me")
+    assert service.accounts["me"].next_sync > 0.0
+
+def test_queries_before_the_first_sync_are_not_answered_with_empty_data(tmp_path):
+    service, _, export = _service(tmp_path)
+    with pytest.raises(AccountNotReady):
+        service.days("me", TODAY, TODAY)
+
+    export.error = RuntimeError("API down")
+    service.sync("me")
+    with pytest.raises(AccountNotReady, match="API down"):
+        service.summary("me", TODAY, TODAY)
+
+def test_archived_days_are_served_from_start(tmp_path, make_day):
+    loaded = []
+
+    def archive_loader(account, start, end):
+        loaded.append((start, end))
+        return [make_day(TODAY)]
+
+    service, _, export = _service(tmp_path, archive_loader)
+    export.error = RuntimeError("API down")
+    service.start()
+    try:
+        assert [d.date for d in service.days("me", TODAY, TODAY)] == [TODAY]
+        assert loaded == [(TODAY - timedelta(days=5), TODAY)]
+    finally:
+        service.stop()
@@ -9,11 +9,20 @@ try:
     from infrastructure.api.yazio_client import YazioClient
     from infrastructure.services.auth_service import AuthService
     from infrastructure.exporters.csv_exporter import CsvExporter
+    from infrastructure.exporters.composite_exporter import CompositeExporter
+    from infrastructure.exporters.rolling_summary_exporter import RollingSummaryExporter
+    from infrastructure.index.product_index import ProductIndex, ProductIndexExporter
+    from infrastructure.archive.raw_archive import RawArchive
+    from infrastructure.archive.archive_client import ArchiveYazioClient
+    from infrastructure.archive.parallel_rebuild import ParallelRebuilder
+    from infrastructure.cache.shared_product_cache import SharedProductCache
+    from infrastructure.cache.account_dirs import account_cache_dir
     from infrastructure.services.google_oauth_service import GoogleOAuthService
     print("Importing application...")
-    from application.use_cases import LoginUseCase, ExportDataUseCase
+    from application.use_cases import LoginUseCase, ExportDataUseCase, ExportPlan
     print("Importing domain...")
     from domain.models import DayLog
+    from domain.analytics import NutritionHistory
     print("Importing ui...")
     from ui.main_window import YazioExporterApp
     print("✅ All imports successful!")
@@ -2,38 +2,64 @@ import tkinter as tk
 from tkinter import ttk, filedialog, messagebox, scrolledtext
 from pathlib import Path
 import threading
+import logging
+import queue
 import os
 from datetime import datetime, timedelta
-from typing import Optional, Any
+from typing import Optional, Any, Callable
 from dotenv import load_dotenv, set_key
 
 # Use Cases and Infra interfaces
 from application.use_cases import LoginUseCase, ExportDataUseCase
+from domain.models import AuthToken, AuthenticationError
 # We import the concrete GoogleOAuthService here because the UI initiates it?
 # Or we treat it as an interface. For now, typing as Any or the concrete class if available to main.
 # We will receive it in __init__
 
+class QueueLogHandler(logging.Handler):
+    """Forwards log records to the UI event queue instead of touching widgets directly."""
+
+    def __init__(self, events: "queue.Queue"):
+        super().__init__(level=logging.INFO)
+        self.events = events
+        self.setFormatter(logging.Formatter("%(levelname)s: %(message)s"))
+
+    def emit(self, record):
+        try:
+            self.events.put_nowait(("log", self.format(record)))
+        except Exception:
+            self.handleError(record)
+
 class YazioExporterApp:
     """Main Window for Yazio CSV Exporter."""
 
+    # Worker threads only enqueue events; the Tk thread drains them on a fixed cadence
+    UI_REFRESH_MS = 100
+    MAX_EVENTS_PER_TICK = 2000
+    MAX_LOG_LINES = 1000
+
     def __init__(self, root: tk.Tk,
                  login_use_case: LoginUseCase,
-                 export_use_case: ExportDataUseCase,
+                 export_use_case_factory: Callable[[str, AuthToken], ExportDataUseCase],
                  google_auth_service: Any, # Infrastructure service for local flow
-                 app_dir: Path):
+                 app_dir: Path,
+                 profile_exports: bool = False):
         self.root = root
         self.root.title("Yazio CSV Exporter (Clean Arch)")
         self.root.geometry("650x700")
         self.root.resizable(True, True)
 
         self.login_use_case = login_use_case
-        self.export_use_case = export_use_case
+        # (email or "", token) -> the use case with that account's caches
+        self.export_use_case_factory = export_use_case_factory
         self.google_auth = google_auth_service
         self.app_dir = app_dir
         self.env_file = self.app_dir / ".env"
 
         # State
         self.auth_token = None
+        self._events: "queue.Queue" = queue.Queue()
+        self._log_lines = 0
 
         # Variables
         self.auth_method_var = tk.StringVar(value="password")
@@ -41,6 +67,7 @@ class YazioExporterApp:
         self.password_var = tk.StringVar()
         self.output_folder_var = tk.StringVar()
         self.google_status_var = tk.StringVar(value="Status: Not connected")
+        self.profile_var = tk.BooleanVar(value=profile_exports)
 
         # Load settings
         self._load_env()
@@ -50,6 +77,11 @@ class YazioExporterApp:
         self._on_auth_method_change()
         self._check_google_status()
 
+        # Route library logging (e.g. per-request client logs) through the batched log view
+        self._log_handler = QueueLogHandler(self._events)
+        logging.getLogger().addHandler(self._log_handler)
+        self.root.after(self.UI_REFRESH_MS, self._drain_events)
+
     def _load_env(self):
         if self.env_file.exists():
             load_dotenv(self.env_file)
@@ -136,6 +168,9 @@ class YazioExporterApp:
         ttk.Entry(out_frame, textvariable=self.output_folder_var, width=50).pack(side=tk.LEFT, fill=tk.X, expand=True)
         ttk.Button(out_frame, text="Browse...", command=self._browse_folder).pack(side=tk.RIGHT, padx=5)
 
+        ttk.Checkbutton(main_frame, text="Profile export (CPU/memory reports per phase)",
+                        variable=self.profile_var).pack(anchor=tk.W)
+
         # Actions
         btn_frame = ttk.Frame(main_frame)
         btn_frame.pack(pady=10)
@@ -145,6 +180,10 @@ class YazioExporterApp:
         self.export_btn.pack(side=tk.LEFT, padx=5)
         ttk.Button(btn_frame, text="Clear Tokens", command=self._clear_tokens).pack(side=tk.LEFT, padx=5)
 
+        # Progress
+        self.progress_bar = ttk.Progressbar(main_frame, mode="determinate")
+        self.progress_bar.pack(fill=tk.X)
+
         # Log
         log_frame = ttk.LabelFrame(main_frame, text="Log", padding="5")
         log_frame.pack(fill=tk.BOTH, expand=True, pady=10)
@@ -161,12 +200,77 @@ class YazioExporterApp:
             self.google_frame.pack(fill=tk.X, pady=(0, 10))
 
     def _log(self, msg):
-        def _append():
-            self.log_text.config(state=tk.NORMAL)
-            self.log_text.insert(tk.END, msg + "\n")
-            self.log_text.see(tk.END)
-            self.log_text.config(state=tk.DISABLED)
-        self.root.after(0, _append)
+        """Thread-safe: queues a log line for the next UI refresh."""
+        self._events.put(("log", msg))
+
+    def _set_progress(self, done: int, total: int):
+        """Thread-safe: queues a progress update (only the latest one per refresh is applied)."""
+        self._events.put(("progress", (done, total)))
+
+    def _set_busy(self, busy: bool):
+        """Thread-safe: queues enabling/disabling the export button."""
+        self._events.put(("busy", busy))
+
+    def _show_message(self, kind: str, title: str, msg: str):
+        """Thread-safe: queues a message box ("info", "warning" or "error")."""
+        self._events.put(("message", (kind, title, msg)))
+
+    def _refresh_google_status(self):
+        """Thread-safe: queues re-checking the Google connection status."""
+        self._events.put(("google_status", None))
+
+    def _drain_events(self):
+        lines = []
+        progress = None
+        busy = None
+        messages = []
+        check_google = False
+        try:
+            for _ in range(self.MAX_EVENTS_PER_TICK):
+                kind, value = self._events.get_nowait()
+                if kind == "log":
+                    lines.append(value)
+                elif kind == "progress":
+                    progress = value
+                elif kind == "busy":
+                    busy = value
+                elif kind == "message":
+                    messages.append(value)
+                elif kind == "google_status":
+                    check_google = True
+        except queue.Empty:
+            pass
+
+        if lines:
+            self._append_log_lines(lines)
+        if progress is not None:
+            done, total = progress
+            self.progress_bar.config(maximum=max(total, 1), value=done)
+        if busy is not None:
+            self.export_btn.config(state=tk.DISABLED if busy else tk.NORMAL)
+        if check_google:
+            self._check_google_status()
+
+        # Rescheduled before the message boxes, which block until dismissed
+        self.root.after(self.UI_REFRESH_MS, self._drain_events)
+        for kind, title, msg in messages:
+            {"info": messagebox.showinfo, "warning": messagebox.showwarning,
+             "error": messagebox.showerror}[kind](title, msg)
+
+    def _append_log_lines(self, lines):
+        # Only the newest lines can survive trimming, so skip inserting the rest
+        lines = lines[-self.MAX_LOG_LINES:]
+        self.log_text.config(state=tk.NORMAL)
+        self.log_text.insert(tk.END, "\n".join(lines) + "\n")
+        self._log_lines += len(lines)
+
+        excess = self._log_lines - self.MAX_LOG_LINES
+        if excess > 0:
+            self.log_text.delete("1.0", f"{excess + 1}.0")
+            self._log_lines -= excess
+
+        self.log_text.see(tk.END)
+        self.log_text.config(state=tk.DISABLED)
 
     def _browse_folder(self):
         curr = self.output_folder_var.get()
@@ -196,7 +300,7 @@ class YazioExporterApp:
                 # 1. Authorize with Google (Infrastructure)
                 tokens = self.google_auth.authenticate(force_new=True)
                 self._log("Google Auth successful (Local)!")
-                self.root.after(0, self._check_google_status)
+                self._refresh_google_status()
 
                 # 2. Exchange for Yazio Token (Application)
                 self._log("Exchanging for Yazio Token...")
@@ -209,7 +313,7 @@ class YazioExporterApp:
 
             except Exception as e:
                 self._log(f"Error: {e}")
-                self.root.after(0, lambda err=str(e): messagebox.showerror("Error", err))
+                self._show_message("error", "Error", str(e))
 
         threading.Thread(target=run, daemon=True).start()
 
@@ -222,10 +326,14 @@ class YazioExporterApp:
         email = self.email_var.get()
         password = self.password_var.get()
         method = self.auth_method_var.get()
+        profile = self.profile_var.get()
+
+        # Disabled right away on the Tk thread, so a second click cannot start another export
+        self.export_btn.config(state=tk.DISABLED)
 
         def run():
             try:
-                self.export_btn.config(state=tk.DISABLED)
+                self._set_progress(0, 1)
                 self._log("Preparing export...")
 
                 token = self.auth_token
@@ -250,21 +358,39 @@ class YazioExporterApp:
 
                 self._log(f"Exporting from {start_date} to {end_date}...")
 
-                created_files = self.export_use_case.execute(
+                export_use_case = self.export_use_case_factory(email if method == "password" else "", token)
+                created_files = export_use_case.execute(
                     token,
                     start_date,
                     end_date,
-                    out_dir
+                    out_dir,
+                    progress=self._set_progress,
+                    profile=profile
                 )
 
-                self._log("Export complete!")
+                failed = export_use_case.last_failed_days
+                self._log("Export incomplete!" if failed else "Export complete!")
+                if export_use_case.last_profile_files:
+                    self._log(f"Profiling reports: {Path(export_use_case.last_profile_files[0]).parent}")
                 self._log(f"Created files: {', '.join([Path(p).name for p in created_files])}")
-                messagebox.showinfo("Success", f"Exported {len(created_files)} CSV files.")
-
+                if failed:
+                    days = ", ".join(d.strftime("%Y-%m-%d") for d in failed)
+                    self._log(f"Days that could not be fetched: {days}")
+                    msg = (f"Exported {len(created_files)} CSV files, but {len(failed)} day(s) could not be "
+                           f"fetched and are missing from them:\n{days}\n\nRun the export again to fill them in.")
+                    self._show_message("warning", "Export Incomplete", msg)
+                else:
+                    self._show_message("info", "Success", f"Exported {len(created_files)} CSV files.")
+
+            except AuthenticationError as e:
+                # The saved token expired; the next export logs in again
+                self.auth_token = None
+                self._log(f"Error: {e}")
+                self._show_message("error", "Export Error", str(e))
             except Exception as e:
                 self._log(f"Error: {e}")
-                self.root.after(0, lambda err=str(e): messagebox.showerror("Export Error", err))
+                self._show_message("error", "Export Error", str(e))
             finally:
-                self.root.after(0, lambda: self.export_btn.config(state=tk.NORMAL))
+                self._set_busy(False)
 
         threading.Thread(target=run, daemon=True).start()